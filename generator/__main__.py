@@ -26,6 +26,7 @@ from generator.const import (
     KAIZE_PASSWORD,
 )
 from generator.prettyprint import Platform, Status
+from generator.transport import metrics
 
 
 def check_environment_variables():
@@ -515,6 +516,114 @@ def prune_all(db_path: str, cache_dir: str):
     return success
 
 
+def show_cache_history(cache_dir: str, name: str):
+    """Show the stored generations of a cache entry."""
+    from generator.blob_store import get_store
+
+    generations = get_store(cache_dir).generations(name)
+    if not generations:
+        pprint.print(Platform.SYSTEM, Status.WARN, f"No stored generations for {name}")
+        return False
+
+    pprint.print(Platform.SYSTEM, Status.INFO, f"Generations of {name}:")
+    for index, generation in enumerate(generations):
+        marker = "current" if index == 0 else f"-{index}"
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"  [{marker}] {generation.created_at.isoformat()} "
+            f"{generation.digest[:12]} ({generation.size} bytes)",
+        )
+    return True
+
+
+def rollback_cache(cache_dir: str, name: str, steps: int = 1):
+    """Point a cache entry back at an older stored generation."""
+    from generator.blob_store import get_store
+
+    try:
+        generation = get_store(cache_dir).rollback(name, steps)
+    except ValueError as e:
+        pprint.print(Platform.SYSTEM, Status.FAIL, f"Rollback failed: {e}")
+        return False
+
+    pprint.print(
+        Platform.SYSTEM,
+        Status.PASS,
+        f"{name} now points at {generation.digest[:12]} "
+        f"from {generation.created_at.isoformat()}",
+    )
+    return True
+
+
+def benchmark_parsers(site: str, paths: list, rounds: int = 5):
+    """Check that the HTML parser backends agree on saved pages and time them.
+
+    Every page is extracted with each backend; the rows must be identical.
+    The best of `rounds` runs is reported per page and in total.
+    """
+    import time
+
+    from generator.html_parser import BACKENDS, HAS_LXML
+    from generator.kaize import kaize_extract_list
+    from generator.nautiljon import nautiljon_extract_table
+
+    if not HAS_LXML:
+        pprint.print(
+            Platform.SYSTEM, Status.FAIL, "lxml is not installed, nothing to compare"
+        )
+        return False
+
+    extract = {"nautiljon": nautiljon_extract_table, "kaize": kaize_extract_list}[site]
+    totals = dict.fromkeys(BACKENDS, 0.0)
+    success = True
+
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        results = {}
+        timings = {}
+        for backend in BACKENDS:
+            best = float("inf")
+            for _ in range(rounds):
+                start = time.perf_counter()
+                results[backend] = extract(html, backend)
+                best = min(best, time.perf_counter() - start)
+            timings[backend] = best
+            totals[backend] += best
+
+        reference = results[BACKENDS[0]]
+        for backend in BACKENDS[1:]:
+            if results[backend] != reference:
+                success = False
+                differing = sum(
+                    a != b for a, b in zip(reference, results[backend])
+                ) + abs(len(reference) - len(results[backend]))
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.FAIL,
+                    f"{path}: {backend} differs from {BACKENDS[0]} "
+                    f"in {differing} of {len(reference)} rows",
+                )
+
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"{path}: {len(reference)} rows, "
+            + ", ".join(f"{b} {timings[b] * 1000:.1f} ms" for b in BACKENDS),
+        )
+
+    pprint.print(
+        Platform.SYSTEM,
+        Status.PASS if success else Status.FAIL,
+        f"{len(paths)} page(s), per page: "
+        + ", ".join(f"{b} {totals[b] / len(paths) * 1000:.1f} ms" for b in BACKENDS)
+        + f" ({totals['bs4'] / totals['lxml']:.1f}x faster with lxml)",
+    )
+    return success
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -608,6 +717,53 @@ def main():
     all_prune_parser.add_argument("--database-url", help="PostgreSQL database URL")
     all_prune_parser.add_argument("--cache-dir", help="Cache directory path")
 
+    # Cache object store commands
+    cache_parser = subparsers.add_parser(
+        "cache", help="Inspect or roll back cache generations (CACHE_STORE=objects)"
+    )
+    cache_subparsers = cache_parser.add_subparsers(
+        dest="cache_action", help="Cache action"
+    )
+
+    cache_history_parser = cache_subparsers.add_parser(
+        "history", help="List stored generations of a cache entry"
+    )
+    cache_history_parser.add_argument("name", help="Cache entry, e.g. aod.json")
+    cache_history_parser.add_argument("--cache-dir", help="Cache directory path")
+    cache_history_parser.add_argument(
+        "--no-env-check", action="store_true", help="Skip environment variable checks"
+    )
+
+    cache_rollback_parser = cache_subparsers.add_parser(
+        "rollback", help="Point a cache entry at an older generation"
+    )
+    cache_rollback_parser.add_argument("name", help="Cache entry, e.g. aod.json")
+    cache_rollback_parser.add_argument(
+        "--steps", type=int, default=1, help="Generations to go back (default: 1)"
+    )
+    cache_rollback_parser.add_argument("--cache-dir", help="Cache directory path")
+    cache_rollback_parser.add_argument(
+        "--no-env-check", action="store_true", help="Skip environment variable checks"
+    )
+
+    # HTML parser backend comparison
+    parser_bench_parser = subparsers.add_parser(
+        "parser-bench",
+        help="Check that the HTML parser backends agree on saved pages and time them",
+    )
+    parser_bench_parser.add_argument(
+        "site", choices=["nautiljon", "kaize"], help="Site the pages come from"
+    )
+    parser_bench_parser.add_argument(
+        "pages", nargs="+", help="Saved listing pages (HTML files)"
+    )
+    parser_bench_parser.add_argument(
+        "--rounds", type=int, default=5, help="Timed runs per page (default: 5)"
+    )
+    parser_bench_parser.add_argument(
+        "--no-env-check", action="store_true", help="Skip environment variable checks"
+    )
+
     # Parse arguments
     args = parser.parse_args()
 
@@ -644,6 +800,20 @@ def main():
         success = run_ingest_phase(db_path, args.force_overwrite_all)
     elif args.command == "status":
         success = get_pipeline_status(db_path)
+    elif args.command == "cache":
+        if args.cache_action == "history":
+            success = show_cache_history(cache_dir, args.name)
+        elif args.cache_action == "rollback":
+            success = rollback_cache(cache_dir, args.name, args.steps)
+        else:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.ERR,
+                "Please specify a cache action: history or rollback",
+            )
+            sys.exit(1)
+    elif args.command == "parser-bench":
+        success = benchmark_parsers(args.site, args.pages, args.rounds)
     elif args.command == "prune":
         if args.prune_target == "cache":
             success = prune_cache(cache_dir)
@@ -661,6 +831,9 @@ def main():
             )
             sys.exit(1)
 
+    # Show where time went on the network
+    metrics.report()
+
     if success:
         pprint.print(
             Platform.SYSTEM,
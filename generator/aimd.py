@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Adaptive concurrency for asyncio crawlers.
+The number of requests in flight grows additively while responses are
+healthy and is cut multiplicatively on throttling, server errors or rising
+latency, the same way TCP congestion control finds the available bandwidth.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AIMDLimiter:
+    """Additive-increase/multiplicative-decrease concurrency limit.
+
+    Use ``async with limiter:`` around each request and report its outcome
+    with `feedback`.
+
+    Args:
+        initial: Starting concurrency
+        minimum: Lowest concurrency the limit is cut to
+        maximum: Highest concurrency the limit grows to
+        decrease: Factor the limit is multiplied by on congestion
+        latency_factor: Latency above this multiple of the healthy baseline
+            counts as congestion
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+    ):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AIMDLimiter":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def feedback(self, healthy: bool, latency: float) -> None:
+        """Adjust the limit after a request finished.
+
+        Args:
+            healthy: False on throttling (429), server errors or failures
+            latency: Seconds the request took
+        """
+        self._samples += 1
+        if healthy and self.baseline is not None and self._samples > 20:
+            # A request much slower than usual is an early sign of overload
+            healthy = latency <= self.baseline * self.latency_factor
+
+        if healthy:
+            # Slowly moving average of healthy latencies
+            self.baseline = (
+                latency
+                if self.baseline is None
+                else self.baseline * 0.95 + latency * 0.05
+            )
+            # +1 per full window of successful requests
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            return
+
+        # Requests already in flight when congestion started report it too;
+        # cut only once per round trip
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or latency):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
@@ -0,0 +1,289 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Content-addressed storage for cache entries.
+Entry bodies are stored once under ``objects/`` by their SHA256, and the
+usual cache names (``aod.json``, ``arm.json.zst``, ...) are symlinks to the
+current generation. Older generations are kept for rollback until the
+eviction policy drops them.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from generator.cache_io import COMPRESSED_SUFFIX, AtomicWriter, atomic_write
+from generator.const import (
+    pprint,
+    CACHE_GENERATIONS,
+    CACHE_MAX_AGE_DAYS,
+    CACHE_MAX_SIZE_MB,
+)
+from generator.prettyprint import Platform, Status
+
+OBJECTS_DIR = "objects"
+"""Directory inside the cache directory that holds the blobs"""
+HISTORY_FILENAME = "history.json"
+"""Per-entry generation history, stored inside the objects directory"""
+
+
+@dataclass
+class Generation:
+    """One stored version of a cache entry."""
+
+    digest: str
+    filename: str
+    size: int
+    created_at: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialise the generation for the history file."""
+        return {
+            "digest": self.digest,
+            "filename": self.filename,
+            "size": self.size,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Generation":
+        """Deserialise a generation from the history file."""
+        return cls(
+            digest=data["digest"],
+            filename=data["filename"],
+            size=data["size"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+
+
+class BlobStore:
+    """Content-addressed blobs plus the generation history of every entry.
+
+    The history lists generations newest first; the first one is what the
+    entry's symlink points at. Identical content is stored once, no matter
+    how many entries or generations refer to it.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        keep: int = CACHE_GENERATIONS,
+        max_age_days: int = CACHE_MAX_AGE_DAYS,
+        max_size_mb: int = CACHE_MAX_SIZE_MB,
+    ):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, OBJECTS_DIR)
+        self.history_path = os.path.join(self.objects_dir, HISTORY_FILENAME)
+        self.keep = max(keep, 1)
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+        self._history: Optional[Dict[str, List[Generation]]] = None
+        self._lock = threading.RLock()
+
+    def object_path(self, digest: str) -> str:
+        """Path of the blob with the given SHA256."""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def add(self, writer: AtomicWriter, link_path: str) -> Generation:
+        """Store a finished write as the new current generation of an entry.
+
+        Args:
+            writer: Writer holding the entry body; its temporary file is
+                consumed
+            link_path: On-disk cache name to point at the blob
+        """
+        writer.finish()
+        digest = writer.hexdigest()
+        object_path = self.object_path(digest)
+
+        with self._lock:
+            if os.path.exists(object_path):
+                # Same content as a stored generation, keep a single copy
+                os.unlink(writer.temp_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(writer.temp_path, object_path)
+
+            generation = Generation(
+                digest=digest,
+                filename=os.path.basename(link_path),
+                size=writer.size,
+                created_at=datetime.now(),
+            )
+            self._link(generation)
+
+            history = self._load()
+            name = self._entry_name(generation.filename)
+            previous = [
+                g for g in history.get(name, []) if g.digest != generation.digest
+            ]
+            history[name] = [generation] + previous
+            self.evict()
+
+        return generation
+
+    def generations(self, name: str) -> List[Generation]:
+        """Stored generations of an entry, newest (current) first."""
+        with self._lock:
+            return list(self._load().get(self._entry_name(name), []))
+
+    def rollback(self, name: str, steps: int = 1) -> Generation:
+        """Point an entry back at an older generation.
+
+        Args:
+            name: Entry name, e.g. ``aod.json``
+            steps: How many generations to go back
+
+        Raises:
+            ValueError: The entry has no generation that old
+        """
+        with self._lock:
+            history = self._load()
+            name = self._entry_name(name)
+            generations = history.get(name, [])
+            if steps < 1 or steps >= len(generations):
+                raise ValueError(
+                    f"{name} has {len(generations)} generation(s), cannot go back {steps}"
+                )
+
+            target = generations[steps]
+            self._link(target)
+            history[name] = [target] + [g for g in generations if g is not target]
+            self._save()
+            return target
+
+    def evict(self, now: Optional[datetime] = None) -> int:
+        """Drop old generations and delete blobs nothing refers to anymore.
+
+        Generations beyond the newest ``keep`` or older than
+        ``max_age_days`` are dropped, then the oldest ones go until all
+        blobs fit in ``max_size_mb``. The current generation of an entry is
+        never evicted. Returns the number of bytes freed.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            history = self._load()
+            for name, generations in history.items():
+                history[name] = generations[:1] + [
+                    g
+                    for g in generations[1 : self.keep]
+                    if not self.max_age_days
+                    or now - g.created_at <= timedelta(days=self.max_age_days)
+                ]
+
+            if self.max_size_mb:
+                limit = self.max_size_mb * 1024 * 1024
+                candidates = sorted(
+                    (
+                        (g.created_at, name, g)
+                        for name, generations in history.items()
+                        for g in generations[1:]
+                    ),
+                    key=lambda item: item[0],
+                )
+                for _, name, generation in candidates:
+                    if self._referenced_size(history) <= limit:
+                        break
+                    history[name].remove(generation)
+
+            freed = self._collect(history)
+            self._save()
+            return freed
+
+    def _referenced_size(self, history: Dict[str, List[Generation]]) -> int:
+        """Total size of the distinct blobs referenced by `history`."""
+        sizes = {g.digest: g.size for gens in history.values() for g in gens}
+        return sum(sizes.values())
+
+    def _collect(self, history: Dict[str, List[Generation]]) -> int:
+        """Delete blobs that no generation refers to and return bytes freed."""
+        referenced = {g.digest for gens in history.values() for g in gens}
+        freed = removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return freed
+
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+            for rest in os.listdir(prefix_dir):
+                if prefix + rest in referenced:
+                    continue
+                path = os.path.join(prefix_dir, rest)
+                freed += os.path.getsize(path)
+                removed += 1
+                os.unlink(path)
+
+        if removed:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Evicted {removed} old cache object(s), {freed / 1024 / 1024:.1f} MB",
+            )
+        return freed
+
+    def _link(self, generation: Generation) -> None:
+        """Atomically point the entry's cache name at a generation's blob."""
+        link_path = os.path.join(self.cache_dir, generation.filename)
+        target = os.path.relpath(
+            self.object_path(generation.digest), os.path.dirname(link_path)
+        )
+        temp_link = os.path.join(self.cache_dir, f".{generation.filename}.link")
+        if os.path.lexists(temp_link):
+            os.unlink(temp_link)
+        os.symlink(target, temp_link)
+        os.replace(temp_link, link_path)
+
+        # Exactly one variant (compressed or not) of an entry is visible
+        if generation.filename.endswith(COMPRESSED_SUFFIX):
+            stale = generation.filename[: -len(COMPRESSED_SUFFIX)]
+        else:
+            stale = generation.filename + COMPRESSED_SUFFIX
+        stale_path = os.path.join(self.cache_dir, stale)
+        if os.path.lexists(stale_path):
+            os.unlink(stale_path)
+
+    @staticmethod
+    def _entry_name(filename: str) -> str:
+        """History key of an entry: its uncompressed filename."""
+        if filename.endswith(COMPRESSED_SUFFIX):
+            return filename[: -len(COMPRESSED_SUFFIX)]
+        return filename
+
+    def _load(self) -> Dict[str, List[Generation]]:
+        if self._history is None:
+            self._history = {}
+            if os.path.exists(self.history_path):
+                with open(self.history_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._history = {
+                    name: [Generation.from_dict(item) for item in items]
+                    for name, items in data.items()
+                }
+        return self._history
+
+    def _save(self) -> None:
+        os.makedirs(self.objects_dir, exist_ok=True)
+        data = {
+            name: [g.to_dict() for g in generations]
+            for name, generations in sorted(self._load().items())
+        }
+        with atomic_write(self.history_path) as writer:
+            writer.write(json.dumps(data, indent=2).encode("utf-8"))
+
+
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(cache_dir: str) -> BlobStore:
+    """Get the shared `BlobStore` of a cache directory."""
+    key = os.path.abspath(cache_dir)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = BlobStore(cache_dir)
+        return _stores[key]
@@ -6,60 +6,105 @@ Cache-aware downloader for GitHub files and external sources.
 Downloads files only when they've changed, maintaining persistent cache.
 """
 
+import functools
 import os
 import requests
-import hashlib
-import tempfile
 import json
-import zstandard as zstd
-from typing import List, Dict, Optional, Tuple, Protocol
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
-
+from urllib.parse import urlsplit
+
+from alive_progress import config_handler
+
+from generator.cache_io import (
+    COMPRESSED_SUFFIX,
+    Digest,
+    atomic_write,
+    cache_path,
+    hash_file,
+    list_cached,
+    open_cached,
+    resolve_cached,
+    stream_to_file,
+    write_json,
+)
+from generator.blob_store import get_store
+from generator.download_cache import CacheEntry, DownloadCacheStore
+from generator.git_fetch import GitError, GitMirror
+from generator.hedging import Attempt, hedge
+from generator.http_cache import ResponseCache, enable_http_cache
+from generator.resumable_download import resumable_download
+from generator.scrape_journal import ScrapeJournal
+from generator.transport import get_session
 from generator.kaize import Kaize
 from generator.nautiljon import Nautiljon
 from generator.otakotaku import OtakOtaku
-from generator.const import pprint
+from generator.const import (
+    pprint,
+    DOWNLOAD_WORKERS,
+    DOWNLOAD_MAX_PER_HOST,
+    DOWNLOAD_REVALIDATION,
+    DOWNLOAD_RESUMABLE,
+    DOWNLOAD_HEDGING,
+    DOWNLOAD_HEDGE_DELAY,
+    DOWNLOAD_BACKEND,
+    DOWNLOAD_GIT_REPOS,
+    HTTP_CACHE,
+    OTAKOTAKU_FULL_SWEEP_DAYS,
+    OTAKOTAKU_INCREMENTAL,
+)
 from generator.prettyprint import Platform, Status
 
 
-class DatabaseConnection(Protocol):
-    """Protocol for database connection compatibility."""
-
-    def cursor(self):
-        """Return a cursor object."""
-        ...
-
-    def commit(self) -> None:
-        """Commit the transaction."""
-        ...
-
+SCRAPER_STATE_FILENAME = ".{name}_state.json"
+"""Per-scraper state kept between runs, e.g. hints for incremental scraping"""
 
-class DatabaseCursor(Protocol):
-    """Protocol for database cursor compatibility."""
+GITHUB_FILES: Dict[str, str] = {
+    # Manual mapping files
+    "kaize_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/kaize_manual.json",
+    "otakotaku_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/otakotaku_manual.json",
+    "silveryasha_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/silveryasha_manual.json",
+    # Data source files
+    "arm.json": "https://raw.githubusercontent.com/kawaiioverflow/arm/master/arm.json",
+    "anitrakt_tv.json": "https://raw.githubusercontent.com/rensetsu/db.trakt.anitrakt/main/db/tv.json",
+    "anitrakt_movie.json": "https://raw.githubusercontent.com/rensetsu/db.trakt.anitrakt/main/db/movies.json",
+    "silveryasha.json": "https://raw.githubusercontent.com/rensetsu/db.rensetsu.public-dump/main/Silveryasha/silveryasha_raw.json",
+    "fribb_animelists.json": "https://raw.githubusercontent.com/Fribb/anime-lists/master/anime-lists-reduced.json",
+}
+"""GitHub-hosted source files, keyed by cache filename"""
 
-    def execute(self, query: str, params: Optional[Tuple] = None) -> None:
-        """Execute a query with optional parameters."""
-        ...
 
-    def fetchone(self) -> Optional[Tuple]:
-        """Fetch one row from the result set."""
-        ...
-
-    def fetchall(self) -> List[Tuple]:
-        """Fetch all rows from the result set."""
-        ...
+@contextmanager
+def _progress_bars_disabled() -> Generator[None, None, None]:
+    """Turn off alive_progress bars for the duration of the block."""
+    config_handler.set_global(disable=True)
+    try:
+        yield
+    finally:
+        config_handler.reset()
 
 
 class CacheDownloader:
     """Handles intelligent file caching with hash-based skip logic."""
 
-    def __init__(self, connection: DatabaseConnection, cache_dir: str = "src/cache"):
-        self.connection = connection
+    def __init__(self, cache: DownloadCacheStore, cache_dir: str = "src/cache"):
+        self.cache = cache
         self.cache_dir = cache_dir
 
         # Create cache directory
         os.makedirs(self.cache_dir, exist_ok=True)
 
+        # Keep-alive connections are pooled in the shared transport
+        self.http = get_session()
+
+        # Downloads run concurrently; the per-host request slots are shared
+        # between worker threads
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
         # GitHub API configuration
         from generator.const import GITHUB_TOKEN
 
@@ -78,91 +123,360 @@ class CacheDownloader:
     def download_github_files(self, ignore_cache: bool = False) -> List[str]:
         """Download all GitHub-hosted files using GitHub SHA for change detection.
 
+        Every source (including AOD) is checked and downloaded concurrently,
+        with at most ``DOWNLOAD_MAX_PER_HOST`` requests in flight per host.
+
         Args:
             ignore_cache: If True, ignore cache and re-download all files
         """
-        github_files = {
-            # Manual mapping files
-            "kaize_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/kaize_manual.json",
-            "otakotaku_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/otakotaku_manual.json",
-            "silveryasha_manual.json": "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/silveryasha_manual.json",
-            # Data source files
-            "arm.json": "https://raw.githubusercontent.com/kawaiioverflow/arm/master/arm.json",
-            "anitrakt_tv.json": "https://raw.githubusercontent.com/rensetsu/db.trakt.anitrakt/main/db/tv.json",
-            "anitrakt_movie.json": "https://raw.githubusercontent.com/rensetsu/db.trakt.anitrakt/main/db/movies.json",
-            "silveryasha.json": "https://raw.githubusercontent.com/rensetsu/db.rensetsu.public-dump/main/Silveryasha/silveryasha_raw.json",
-            "fribb_animelists.json": "https://raw.githubusercontent.com/Fribb/anime-lists/master/anime-lists-reduced.json",
-        }
-
         downloaded_files = []
 
         pprint.print(Platform.SYSTEM, Status.INFO, "Downloading GitHub-hosted files...")
-        for filename, url in github_files.items():
-            try:
-                # Convert raw URL to API URL for SHA checking
-                api_url = self._get_github_api_url(url)
-                if api_url:
-                    current_sha = self._get_github_file_sha(api_url)
-
-                    if not current_sha:
-                        pprint.print(
-                            Platform.SYSTEM,
-                            Status.WARN,
-                            f"Could not get SHA for {filename}, downloading anyway",
-                        )
-                        should_download = True
-                    else:
-                        should_download = (
-                            ignore_cache
-                            or self._should_download_github_file(url, current_sha)
-                        )
-                else:
-                    # Not a GitHub URL, download anyway
-                    should_download = True
-                    current_sha = None
 
-                if should_download:
-                    file_path = os.path.join(self.cache_dir, filename)
+        # Repositories handled by the git backend, with their files
+        git_repos: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+        http_files = dict(GITHUB_FILES)
+        if DOWNLOAD_BACKEND == "git":
+            for filename, url in GITHUB_FILES.items():
+                parsed = self._parse_github_raw_url(url)
+                if parsed and f"{parsed[0]}/{parsed[1]}".lower() in DOWNLOAD_GIT_REPOS:
+                    git_repos.setdefault(parsed[:3], {})[filename] = url
+                    del http_files[filename]
+
+        # Look up every blob SHA up front, one API call per repository
+        known_shas = {}
+        if DOWNLOAD_REVALIDATION == "sha":
+            known_shas = self._resolve_github_shas(list(http_files.values()))
+
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    self._download_github_file,
+                    filename,
+                    url,
+                    ignore_cache,
+                    known_shas.get(url),
+                )
+                for filename, url in http_files.items()
+            ]
+            # Handle AOD separately (GitHub releases with zstd)
+            futures.append(executor.submit(self._download_aod, ignore_cache))
+
+            repo_futures = [
+                executor.submit(
+                    self._download_git_repo, account, repo, branch, files, ignore_cache
+                )
+                for (account, repo, branch), files in git_repos.items()
+            ]
+
+            for future in as_completed(futures):
+                file_path = future.result()
+                if file_path:
+                    downloaded_files.append(file_path)
+            for future in as_completed(repo_futures):
+                downloaded_files.extend(future.result())
+
+        return downloaded_files
 
-                    # Download file
-                    response = requests.get(
-                        url, headers=self.github_headers if api_url else {}, timeout=30
+    def _download_git_repo(
+        self,
+        account: str,
+        repo: str,
+        branch: str,
+        files: Dict[str, str],
+        ignore_cache: bool = False,
+    ) -> List[str]:
+        """Update the local clone of a repository and copy out its changed files.
+
+        The blob SHAs come from the fetched tree itself, so no API calls are
+        needed. If the clone cannot be updated, the files are downloaded over
+        HTTP instead.
+
+        Args:
+            files: Cache filename to raw URL of every file in this repository
+        """
+        mirror = GitMirror(self.cache_dir, account, repo, branch)
+        try:
+            with self._host_slot("https://github.com"):
+                mirror.update()
+        except GitError as e:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"Could not fetch {mirror.name} with git, using HTTP: {e}",
+            )
+            downloaded = [
+                self._download_github_file(filename, url, ignore_cache)
+                for filename, url in files.items()
+            ]
+            return [file_path for file_path in downloaded if file_path]
+
+        downloaded_files = []
+        for filename, url in files.items():
+            entry_path = os.path.join(self.cache_dir, filename)
+            file_path = cache_path(entry_path)
+            parsed = self._parse_github_raw_url(url)
+            # Files were grouped by their parsed URL, so this cannot fail
+            assert parsed is not None
+            filepath = parsed[3]
+
+            try:
+                sha = mirror.blob_sha(filepath)
+                if not sha:
+                    pprint.print(
+                        Platform.SYSTEM,
+                        Status.ERR,
+                        f"{filepath} not found in {mirror.name}",
                     )
-                    response.raise_for_status()
-
-                    # Save to cache
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(response.text)
-
-                    # Update cache record
-                    self._update_download_cache(
-                        url,
-                        file_path,
-                        current_sha or self._compute_file_hash(file_path),
-                        "github",
+                    continue
+
+                if (
+                    not ignore_cache
+                    and os.path.exists(file_path)
+                    and not self._should_download_github_file(url, sha)
+                ):
+                    pprint.print(
+                        Platform.SYSTEM, Status.INFO, f"Skipping {filename} (unchanged)"
                     )
-                    downloaded_files.append(file_path)
+                    continue
+
+                file_hash = mirror.copy_blob(sha, entry_path)
+                self._update_download_cache(
+                    url, file_path, sha, "github", {"sha256": file_hash}
+                )
+                pprint.print(
+                    Platform.SYSTEM, Status.PASS, f"Downloaded {filename} (git)"
+                )
+                downloaded_files.append(file_path)
+
+            except Exception as e:
+                pprint.print(
+                    Platform.SYSTEM, Status.ERR, f"Error copying {filename}: {e}"
+                )
+
+        return downloaded_files
+
+    def _download_github_file(
+        self,
+        filename: str,
+        url: str,
+        ignore_cache: bool = False,
+        known_sha: Optional[str] = None,
+    ) -> Optional[str]:
+        """Check a single GitHub-hosted file and download it if it changed.
+
+        In ``sha`` revalidation mode the blob SHA comes from ``known_sha``
+        (resolved from the repository tree) or, failing that, from the
+        contents API. In ``conditional`` mode the stored ETag and
+        Last-Modified validators are sent with the download itself, so an
+        unchanged file costs a single bodiless 304 response.
+        """
+        try:
+            entry_path = os.path.join(self.cache_dir, filename)
+            file_path = cache_path(entry_path)
+
+            # Convert raw URL to API URL for SHA checking
+            api_url = self._get_github_api_url(url)
+            conditional_headers = {}
+            current_sha = None
 
-                    pprint.print(Platform.SYSTEM, Status.PASS, f"Downloaded {filename}")
+            if api_url and DOWNLOAD_REVALIDATION == "sha":
+                current_sha = known_sha or self._get_github_file_sha(api_url)
+
+                if not current_sha:
+                    pprint.print(
+                        Platform.SYSTEM,
+                        Status.WARN,
+                        f"Could not get SHA for {filename}, downloading anyway",
+                    )
+                    should_download = True
                 else:
+                    should_download = (
+                        ignore_cache
+                        or not os.path.exists(file_path)
+                        or self._should_download_github_file(url, current_sha)
+                    )
+
+                if not should_download:
                     pprint.print(
                         Platform.SYSTEM, Status.INFO, f"Skipping {filename} (unchanged)"
                     )
+                    return None
+            elif not ignore_cache:
+                conditional_headers = self._conditional_headers(
+                    file_path, self._get_cache_metadata(url)
+                )
 
-            except Exception as e:
+            # Download file, streaming it to the cache while hashing; the
+            # blob SHA, when known, doubles as an integrity check
+            headers = {
+                **(self.github_headers if api_url else {}),
+                **conditional_headers,
+            }
+            expected_digest = ("git-blob", current_sha) if current_sha else None
+            mirror_url = (
+                self._get_mirror_url(url) if DOWNLOAD_HEDGING and current_sha else None
+            )
+
+            response: Optional[requests.Response]
+            if mirror_url and expected_digest:
+                response, file_hash = self._fetch_hedged(
+                    filename, url, mirror_url, entry_path, headers, expected_digest
+                )
+            else:
+                response, file_hash = self._fetch(
+                    url,
+                    entry_path,
+                    headers=headers,
+                    timeout=30,
+                    expected_digest=expected_digest,
+                )
+            if file_hash is None:
                 pprint.print(
-                    Platform.SYSTEM, Status.ERR, f"Error downloading {filename}: {e}"
+                    Platform.SYSTEM, Status.INFO, f"Skipping {filename} (unchanged)"
                 )
-                continue
+                return None
 
-        # Handle AOD separately (GitHub releases with zstd)
-        aod_file = self._download_aod()
-        if aod_file:
-            downloaded_files.append(aod_file)
+            # Update cache record
+            self._update_download_cache(
+                url,
+                file_path,
+                current_sha or file_hash,
+                "github",
+                # The blob SHA does not cover the stored bytes when the
+                # cache is compressed, so keep their hash for verification
+                # A mirror's validators mean nothing to GitHub
+                {
+                    **(
+                        self._response_validators(response)
+                        if response is not None
+                        else {}
+                    ),
+                    "sha256": file_hash,
+                },
+            )
 
-        return downloaded_files
+            pprint.print(Platform.SYSTEM, Status.PASS, f"Downloaded {filename}")
+            return file_path
 
-    def _download_aod(self) -> Optional[str]:
+        except Exception as e:
+            pprint.print(
+                Platform.SYSTEM, Status.ERR, f"Error downloading {filename}: {e}"
+            )
+            return None
+
+    def _fetch(
+        self,
+        url: str,
+        entry_path: str,
+        headers: Dict[str, str],
+        timeout: int,
+        precompressed: bool = False,
+        expected_digest: Optional[Digest] = None,
+        cancelled: Optional[threading.Event] = None,
+        resolve_digest: Optional[Callable[[], Optional[Digest]]] = None,
+    ) -> Tuple[requests.Response, Optional[str]]:
+        """Download a source into its cache entry.
+
+        The body is streamed straight into the cache in either case. With
+        ``DOWNLOAD_RESUMABLE`` it is also kept in a ``.part`` file that
+        survives interruptions, and is verified before it replaces the entry.
+
+        Returns:
+            The response and the SHA256 of the stored entry, or ``None`` if
+            the server answered 304 Not Modified.
+        """
+        if DOWNLOAD_RESUMABLE:
+            return resumable_download(
+                url,
+                entry_path,
+                headers=headers,
+                timeout=timeout,
+                precompressed=precompressed,
+                expected_digest=expected_digest,
+                slot=lambda: self._host_slot(url),
+                cancelled=cancelled,
+                resolve_digest=resolve_digest,
+            )
+
+        with (
+            self._host_slot(url),
+            self.http.get(
+                url, headers=headers, timeout=timeout, stream=True
+            ) as response,
+        ):
+            if response.status_code == 304:
+                return response, None
+            response.raise_for_status()
+            return response, stream_to_file(
+                response, entry_path, precompressed, cancelled
+            )
+
+    def _fetch_hedged(
+        self,
+        filename: str,
+        url: str,
+        mirror_url: str,
+        entry_path: str,
+        headers: Dict[str, str],
+        expected_digest: Digest,
+    ) -> Tuple[Optional[requests.Response], Optional[str]]:
+        """Download from GitHub, racing the mirror if GitHub is slow.
+
+        The mirror only starts after ``DOWNLOAD_HEDGE_DELAY`` seconds without
+        a result, and whichever download finishes first wins. Mirrors may
+        lag behind the branch, so both sides go through the verifying
+        download path and only count if they match the blob SHA. Only the
+        first verified body is committed to the cache entry.
+
+        Returns:
+            The GitHub response, or None if the mirror won (its validators
+            do not apply to GitHub), and the SHA256 of the stored entry
+        """
+
+        def attempt(
+            source: str, source_headers: Dict[str, str], variant: str = ""
+        ) -> Attempt[Tuple[requests.Response, Optional[str]]]:
+            def download(
+                cancelled: threading.Event,
+            ) -> Tuple[requests.Response, Optional[str]]:
+                return resumable_download(
+                    source,
+                    entry_path,
+                    headers=source_headers,
+                    timeout=30,
+                    expected_digest=expected_digest,
+                    slot=lambda: self._host_slot(source),
+                    cancelled=cancelled,
+                    variant=variant,
+                )
+
+            return download
+
+        winner, result = hedge(
+            [attempt(url, headers), attempt(mirror_url, {}, ".mirror")],
+            DOWNLOAD_HEDGE_DELAY,
+        )
+        if winner:
+            pprint.print(
+                Platform.SYSTEM, Status.INFO, f"Got {filename} from the mirror"
+            )
+            return None, result[1]
+        return result
+
+    @contextmanager
+    def _host_slot(self, url: str) -> Generator[None, None, None]:
+        """Hold one of the per-host request slots for the duration of a request."""
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(DOWNLOAD_MAX_PER_HOST)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+
+    def _download_aod(self, ignore_cache: bool = False) -> Optional[str]:
         """Download AOD from GitHub releases with special handling."""
         url = "https://github.com/manami-project/anime-offline-database/releases/download/latest/anime-offline-database-minified.json.zst"
         filename = "aod.json"
@@ -174,77 +488,50 @@ class CacheDownloader:
                 f"Downloading {filename} from GitHub releases...",
             )
 
-            # For GitHub releases, we can't use SHA easily, so check ETag or Last-Modified
-            file_path = os.path.join(self.cache_dir, filename)
-
-            # Get current cache info
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                SELECT file_hash, metadata FROM download_cache 
-                WHERE source_url = ? AND source_type = 'github_release'
-            """,
-                (url,),
+            # For GitHub releases, we can't use SHA easily, so revalidate
+            # against the stored ETag or Last-Modified with a conditional GET
+            entry_path = os.path.join(self.cache_dir, filename)
+            file_path = cache_path(entry_path)
+            conditional_headers = (
+                {}
+                if ignore_cache
+                else self._conditional_headers(file_path, self._get_cache_metadata(url))
+            )
+
+            # The release lists a SHA256 for the asset, which the resumable
+            # download verifies before the cache entry is replaced. It is
+            # only looked up once the asset turns out to have changed
+            resolve_digest = functools.partial(
+                self._get_release_asset_digest,
+                "manami-project",
+                "anime-offline-database",
+                "anime-offline-database-minified.json.zst",
+            )
+
+            # AOD is zstd upstream, so it is stored as-is when the cache is
+            # compressed at rest and piped through a decompressor otherwise
+            response, file_hash = self._fetch(
+                url,
+                entry_path,
+                headers=conditional_headers,
+                timeout=120,
+                precompressed=True,
+                resolve_digest=resolve_digest,
             )
-            cache_info = cursor.fetchone()
-
-            # Make HEAD request to check if file changed
-            head_response = requests.head(url, allow_redirects=True)
-            etag = head_response.headers.get("ETag", "")
-            last_modified = head_response.headers.get("Last-Modified", "")
-
-            # Check if we should download
-            should_download = True
-            if cache_info and cache_info[1]:
-                try:
-                    metadata = json.loads(cache_info[1])
-                    if (
-                        metadata.get("etag") == etag
-                        or metadata.get("last_modified") == last_modified
-                    ):
-                        should_download = False
-                except Exception:
-                    pass
-
-            if not should_download:
+            if file_hash is None:
                 pprint.print(
                     Platform.SYSTEM, Status.INFO, f"Skipping {filename} (unchanged)"
                 )
                 return None
 
-            # Download to temporary location
-            with tempfile.NamedTemporaryFile(mode="w+b", delete=False) as temp_file:
-                response = requests.get(url, timeout=120)
-                response.raise_for_status()
-                temp_file.write(response.content)
-                temp_path = temp_file.name
-
-            # Decompress zstd file
-            with open(temp_path, "rb") as f:
-                dctx = zstd.ZstdDecompressor()
-                with dctx.stream_reader(f) as reader:
-                    decompressed = reader.read()
-
-            # Save decompressed JSON
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(decompressed.decode("utf-8"))
-
-            # Clean up temp file
-            os.unlink(temp_path)
-
-            # Compute hash and update cache with metadata
-            file_hash = self._compute_file_hash(file_path)
-            metadata = json.dumps({"etag": etag, "last_modified": last_modified})
-
-            cursor.execute("DELETE FROM download_cache WHERE source_url = ?", (url,))
-            cursor.execute(
-                """
-                INSERT INTO download_cache (source_type, source_url, file_path, file_hash, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                ("github_release", url, file_path, file_hash, metadata),
+            # Update cache with metadata
+            self._update_download_cache(
+                url,
+                file_path,
+                file_hash,
+                "github_release",
+                self._response_validators(response),
             )
-            self.connection.commit()
 
             pprint.print(Platform.SYSTEM, Status.PASS, f"Downloaded {filename}")
             return file_path
@@ -255,11 +542,17 @@ class CacheDownloader:
             )
             return None
 
-    def run_scrapers(self, ignore_cache: bool = False) -> List[str]:
+    def run_scrapers(
+        self, ignore_cache: bool = False, concurrent: bool = False
+    ) -> List[str]:
         """Run scrapers for Kaize, Nautiljon, and Otak Otaku.
 
         Args:
             ignore_cache: If True, ignore cache expiry and re-run all scrapers
+            concurrent: If True, run the due scrapers at the same time. They
+                hit different hosts and share no state; a failing scraper
+                does not affect the others. Progress bars are turned off,
+                since other downloads may be logging alongside.
         """
         scraped_files = []
 
@@ -306,166 +599,363 @@ class CacheDownloader:
         )
 
         # Run only the scrapers that need to run
-        if "kaize" in scrapers_to_run:
-            kaize_file = self._run_kaize_scraper()
-            if kaize_file:
-                scraped_files.append(kaize_file)
-
-        if "nautiljon" in scrapers_to_run:
-            nautiljon_file = self._run_nautiljon_scraper()
-            if nautiljon_file:
-                scraped_files.append(nautiljon_file)
-
-        if "otakotaku" in scrapers_to_run:
-            otakotaku_file = self._run_otakotaku_scraper()
-            if otakotaku_file:
-                scraped_files.append(otakotaku_file)
+        runners = {
+            "kaize": self._run_kaize_scraper,
+            "nautiljon": self._run_nautiljon_scraper,
+            "otakotaku": lambda: self._run_otakotaku_scraper(ignore_cache),
+        }
+        if concurrent:
+            # Progress bars would be overwritten by the other scrapers and by
+            # the GitHub downloads logging from their own threads
+            with (
+                _progress_bars_disabled(),
+                ThreadPoolExecutor(max_workers=len(scrapers_to_run)) as executor,
+            ):
+                futures = [executor.submit(runners[name]) for name in scrapers_to_run]
+                results = [future.result() for future in futures]
+        else:
+            results = [runners[name]() for name in scrapers_to_run]
 
+        # Results keep the kaize, nautiljon, otakotaku order either way
+        scraped_files.extend(file_path for file_path in results if file_path)
         return scraped_files
 
     def get_all_cache_files(self) -> Dict[str, str]:
-        """Get all cached files."""
-        cache_files = {}
+        """Get all cached files, keyed by their uncompressed filename."""
+        return list_cached(self.cache_dir)
 
-        # Get all JSON files in cache directory
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith(".json"):
-                cache_files[filename] = os.path.join(self.cache_dir, filename)
+    def _parse_github_raw_url(
+        self, raw_url: str
+    ) -> Optional[Tuple[str, str, str, str]]:
+        """Split a GitHub raw URL into (account, repo, branch, filepath)."""
+        if "raw.githubusercontent.com" not in raw_url:
+            return None
 
-        return cache_files
+        # Parse the URL parts
+        # Remove the protocol and domain
+        path = raw_url.replace("https://raw.githubusercontent.com/", "")
+
+        # Split by / to get components
+        parts = path.split("/", 3)  # Split into max 4 parts
+
+        if len(parts) < 4:
+            return None
+
+        account, repo, branch, filepath = parts
+        return account, repo, branch, filepath
+
+    def _get_mirror_url(self, raw_url: str) -> Optional[str]:
+        """Convert a GitHub raw URL to the same file on the jsDelivr CDN."""
+        parsed = self._parse_github_raw_url(raw_url)
+        if not parsed:
+            return None
+        account, repo, branch, filepath = parsed
+        return f"https://cdn.jsdelivr.net/gh/{account}/{repo}@{branch}/{filepath}"
 
     def _get_github_api_url(self, raw_url: str) -> Optional[str]:
         """Convert GitHub raw URL to API URL."""
         # Example: https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/raw/kaize_manual.json
         # Needs to become: https://api.github.com/repos/nattadasu/animeApi/contents/database/raw/kaize_manual.json?ref=v3
 
-        if "raw.githubusercontent.com" not in raw_url:
+        parsed = self._parse_github_raw_url(raw_url)
+        if not parsed:
             return None
 
-        try:
-            # Parse the URL parts
-            # Remove the protocol and domain
-            path = raw_url.replace("https://raw.githubusercontent.com/", "")
+        account, repo, branch, filepath = parsed
 
-            # Split by / to get components
-            parts = path.split("/", 3)  # Split into max 4 parts
+        # Construct the API URL
+        return f"https://api.github.com/repos/{account}/{repo}/contents/{filepath}?ref={branch}"
 
-            if len(parts) < 4:
-                return None
+    def _resolve_github_shas(self, raw_urls: List[str]) -> Dict[str, str]:
+        """Resolve blob SHAs for GitHub raw URLs with one tree listing per repository.
 
-            account = parts[0]
-            repo = parts[1]
-            branch = parts[2]
-            filepath = parts[3]
-
-            # Construct the API URL
-            api_url = f"https://api.github.com/repos/{account}/{repo}/contents/{filepath}?ref={branch}"
+        Sources are grouped by (account, repo, branch), so adding more files
+        from an already listed repository costs no extra API calls. URLs
+        that cannot be resolved are left out and fall back to the per-file
+        contents API.
+        """
+        repos: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+        for raw_url in raw_urls:
+            parsed = self._parse_github_raw_url(raw_url)
+            if parsed:
+                account, repo, branch, filepath = parsed
+                repos.setdefault((account, repo, branch), {})[filepath] = raw_url
+
+        shas: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            futures = {
+                executor.submit(self._get_github_tree_shas, *repo_key): files
+                for repo_key, files in repos.items()
+            }
+            for future in as_completed(futures):
+                tree = future.result()
+                for filepath, raw_url in futures[future].items():
+                    if filepath in tree:
+                        shas[raw_url] = tree[filepath]
+
+        return shas
+
+    def _get_github_tree_shas(
+        self, account: str, repo: str, branch: str
+    ) -> Dict[str, str]:
+        """Get blob SHAs of every file in a repository from one recursive tree listing."""
+        api_url = f"https://api.github.com/repos/{account}/{repo}/git/trees/{branch}?recursive=1"
+        try:
+            with self._host_slot(api_url):
+                response = self.http.get(
+                    api_url, headers=self.github_headers, timeout=30
+                )
+            response.raise_for_status()
+            tree = response.json()
+        except Exception as e:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.ERR,
+                f"Error getting GitHub tree for {account}/{repo}: {e}",
+            )
+            return {}
 
-            return api_url
+        if tree.get("truncated"):
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"GitHub tree for {account}/{repo} is truncated, some files will be checked individually",
+            )
 
-        except Exception:
-            return None
+        return {
+            entry["path"]: entry["sha"]
+            for entry in tree.get("tree", [])
+            if entry.get("type") == "blob"
+        }
 
     def _get_github_file_sha(self, api_url: str) -> Optional[str]:
         """Get SHA hash of a file from GitHub API."""
         try:
-            response = requests.get(api_url, headers=self.github_headers, timeout=10)
+            with self._host_slot(api_url):
+                response = self.http.get(
+                    api_url, headers=self.github_headers, timeout=10
+                )
             response.raise_for_status()
             return response.json().get("sha")
         except Exception as e:
             pprint.print(Platform.SYSTEM, Status.ERR, f"Error getting GitHub SHA: {e}")
             return None
 
-    def _compute_file_hash(self, file_path: str) -> str:
-        """Compute SHA256 hash of file."""
-        hasher = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+    def _get_release_asset_digest(
+        self, account: str, repo: str, asset_name: str
+    ) -> Optional[Digest]:
+        """Get the digest GitHub publishes for an asset of the latest release."""
+        api_url = f"https://api.github.com/repos/{account}/{repo}/releases/latest"
+        try:
+            with self._host_slot(api_url):
+                response = self.http.get(
+                    api_url, headers=self.github_headers, timeout=10
+                )
+            response.raise_for_status()
+            for asset in response.json().get("assets", []):
+                if asset.get("name") == asset_name and asset.get("digest"):
+                    algorithm, _, digest = asset["digest"].partition(":")
+                    if algorithm == "sha256":
+                        return algorithm, digest
+        except Exception as e:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"Could not get release digest for {asset_name}: {e}",
+            )
+        return None
+
+    def _get_cache_metadata(self, url: str) -> Dict[str, str]:
+        """Get the metadata (HTTP validators) stored for a cached source."""
+        entry = self.cache.get(url)
+        return entry.metadata if entry else {}
+
+    @staticmethod
+    def _conditional_headers(
+        file_path: str, metadata: Dict[str, str]
+    ) -> Dict[str, str]:
+        """Build revalidation headers from stored validators.
+
+        Nothing is sent when the cached file itself is missing, so the
+        server cannot answer 304 for a file we no longer have.
+        """
+        headers = {}
+        if not os.path.exists(file_path):
+            return headers
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+        return headers
+
+    @staticmethod
+    def _response_validators(response: requests.Response) -> Dict[str, str]:
+        """Extract the validators to store for the next conditional request."""
+        return {
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+        }
 
     def _should_download_github_file(self, url: str, current_sha: str) -> bool:
         """Check if GitHub file should be downloaded based on SHA."""
-        cursor = self.connection.cursor()
-        cursor.execute(
-            """
-            SELECT file_hash FROM download_cache 
-            WHERE source_url = ? AND source_type = 'github'
-        """,
-            (url,),
-        )
-
-        result = cursor.fetchone()
-        return result is None or result[0] != current_sha
+        entry = self.cache.get(url)
+        return entry is None or entry.file_hash != current_sha
 
     def _update_download_cache(
-        self, url: str, file_path: str, file_hash: str, source_type: str
+        self,
+        url: str,
+        file_path: str,
+        file_hash: str,
+        source_type: str,
+        metadata: Optional[Dict[str, str]] = None,
     ) -> None:
         """Update download cache with new file information."""
-        cursor = self.connection.cursor()
-
         # Set expiry for rate-limited sources
         expires_at = None
         if source_type == "scraper":
-            expires_at = (datetime.now() + timedelta(days=14)).isoformat()
-
-        # Delete existing record if present
-        cursor.execute("DELETE FROM download_cache WHERE source_url = ?", (url,))
-
-        # Insert new record
-        cursor.execute(
-            """
-            INSERT INTO download_cache (source_type, source_url, file_path, file_hash, expires_at)
-            VALUES (?, ?, ?, ?, ?)
-        """,
-            (source_type, url, file_path, file_hash, expires_at),
+            expires_at = datetime.now() + timedelta(days=14)
+
+        self.cache.upsert(
+            CacheEntry(
+                source_type=source_type,
+                source_url=url,
+                file_path=file_path,
+                file_hash=file_hash,
+                expires_at=expires_at,
+                metadata=metadata or {},
+            )
         )
 
-        self.connection.commit()
-
     def clean_expired_cache(self) -> None:
-        """Remove expired cache entries."""
-        cursor = self.connection.cursor()
-        cursor.execute(
-            """
-            DELETE FROM download_cache 
-            WHERE expires_at IS NOT NULL AND expires_at < ?
-        """,
-            (datetime.now().isoformat(),),
+        """Remove expired cache entries and stale cached responses."""
+        self.cache.expire()
+        if HTTP_CACHE:
+            freed = ResponseCache(self.cache_dir).evict()
+            if freed:
+                pprint.print(
+                    Platform.SYSTEM,
+                    Status.INFO,
+                    f"Evicted {freed / 1e6:.1f} MB of stale cached responses",
+                )
+
+    def verify_cache(self) -> List[str]:
+        """Check cached files against their recorded hashes.
+
+        All files are hashed in parallel. A source whose file is missing or
+        does not match loses its cache entry, so only that source is
+        fetched (or scraped) again by this download phase.
+
+        Returns:
+            URLs of the sources that failed verification
+        """
+        entries = self.cache.all()
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            results = list(executor.map(self._verify_cache_entry, entries))
+
+        invalid = []
+        for entry, valid in zip(entries, results):
+            if valid:
+                continue
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"Cached {os.path.basename(entry.file_path)} is missing or corrupt, fetching it again",
+            )
+            self.cache.remove(entry.source_url)
+            invalid.append(entry.source_url)
+
+        pprint.print(
+            Platform.SYSTEM,
+            Status.INFO,
+            f"Verified {len(entries) - len(invalid)}/{len(entries)} cached files",
         )
-        self.connection.commit()
+        return invalid
+
+    def _verify_cache_entry(self, entry: CacheEntry) -> bool:
+        """Check whether a cached file still matches its recorded hash."""
+        if not os.path.exists(entry.file_path):
+            return False
+
+        digest = self._recorded_digest(entry)
+        if digest is None:
+            # Nothing to compare against, trust the file
+            return True
+        algorithm, expected = digest
+        try:
+            actual = hash_file(entry.file_path, algorithm)
+            if actual == expected:
+                return True
+            if not os.path.islink(entry.file_path):
+                return False
+            # `cache rollback` points the entry at an older generation of the
+            # blob store without touching the recorded digest
+            if algorithm != "sha256":
+                actual = hash_file(entry.file_path, "sha256")
+            return actual in self._stored_digests(entry.file_path)
+        except OSError:
+            return False
+
+    @staticmethod
+    def _stored_digests(file_path: str) -> set:
+        """SHA256s of the generations the blob store keeps of a cache file."""
+        store = get_store(os.path.dirname(file_path))
+        return {g.digest for g in store.generations(os.path.basename(file_path))}
+
+    @staticmethod
+    def _recorded_digest(entry: CacheEntry) -> Optional[Digest]:
+        """Get the digest of the stored bytes recorded for a source, if any.
+
+        Entries recorded before the SHA256 was kept in the metadata only
+        have ``file_hash``, which is a SHA256 of the file for most sources
+        and a blob SHA of the uncompressed content for GitHub files.
+        """
+        if entry.metadata.get("sha256"):
+            return "sha256", entry.metadata["sha256"]
+        if len(entry.file_hash) == 64:
+            return "sha256", entry.file_hash
+        if len(entry.file_hash) == 40 and not entry.file_path.endswith(
+            COMPRESSED_SUFFIX
+        ):
+            return "git-blob", entry.file_hash
+        return None
 
     def _should_run_scraper(self, scraper_name: str) -> bool:
         """Check if a specific scraper should run based on rate limiting."""
-        cursor = self.connection.cursor()
-
-        url = f"scraper://{scraper_name}"
-        cursor.execute(
-            """
-            SELECT expires_at FROM download_cache 
-            WHERE source_url = ? AND source_type = 'scraper'
-        """,
-            (url,),
-        )
-
-        result = cursor.fetchone()
-        if result is None:
+        entry = self.cache.get(f"scraper://{scraper_name}")
+        if entry is None:
             pprint.print(
                 Platform.SYSTEM, Status.INFO, f"No cache entry for {scraper_name}"
             )
             return True  # No cache entry, should run
 
-        expires_at = result[0]
-        if expires_at:
-            expiry_time = datetime.fromisoformat(expires_at)
-            if datetime.now() > expiry_time:
-                pprint.print(
-                    Platform.SYSTEM, Status.INFO, f"Cache expired for {scraper_name}"
-                )
-                return True  # Cache expired, should run
+        if entry.is_expired():
+            pprint.print(
+                Platform.SYSTEM, Status.INFO, f"Cache expired for {scraper_name}"
+            )
+            return True  # Cache expired, should run
 
         return False  # Cache is still valid
 
+    def _kaize_session_path(self, session_file: str) -> Optional[str]:
+        """Resolve where the Kaize login cookies are kept, if anywhere.
+
+        The cache directory is persisted by CI, so a session file inside it
+        would ship the login with every cache upload and is refused.
+        """
+        if not session_file:
+            return None
+        path = os.path.abspath(os.path.expanduser(session_file))
+        cache_dir = os.path.abspath(self.cache_dir)
+        if os.path.commonpath([path, cache_dir]) == cache_dir:
+            pprint.print(
+                Platform.KAIZE,
+                Status.WARN,
+                "KAIZE_SESSION_FILE is inside the cache directory, "
+                "not saving the login",
+            )
+            return None
+        return path
+
     def _run_kaize_scraper(self) -> Optional[str]:
         """Run Kaize scraper and save data."""
         pprint.print(Platform.KAIZE, Status.INFO, "Running scraper...")
@@ -474,6 +964,7 @@ class CacheDownloader:
         from generator.const import (
             KAIZE_EMAIL,
             KAIZE_PASSWORD,
+            KAIZE_SESSION_FILE,
         )
 
         email = KAIZE_EMAIL
@@ -492,18 +983,29 @@ class CacheDownloader:
             kaize = Kaize(
                 email=email,  # type: ignore
                 password=password,  # type: ignore
+                session_path=self._kaize_session_path(KAIZE_SESSION_FILE),
             )
+            # No response cache: the pages are fetched logged in, and the
+            # cache directory is persisted by CI
+
+            # Get data, starting the last page search from the previous count
+            state = self._load_scraper_state("kaize", Platform.KAIZE)
+            with self._scrape_journal("kaize", Platform.KAIZE) as journal:
+                data = kaize.get_anime(
+                    last_page_hint=state.get("last_page"), journal=journal
+                )
 
-            # Get data
-            data = kaize.get_anime()
+                # Save to cache
+                entry_path = os.path.join(self.cache_dir, "kaize.json")
+                file_hash = write_json(entry_path, data)
+                file_path = cache_path(entry_path)
+                journal.finish()
 
-            # Save to cache
-            file_path = os.path.join(self.cache_dir, "kaize.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
+            self._save_scraper_state("kaize", {"last_page": kaize.last_page})
+            # Keep the cookies the site refreshed during the run
+            kaize.save_session()
 
-            # Compute hash and update cache
-            file_hash = self._compute_file_hash(file_path)
+            # Update cache
             self._update_download_cache(
                 "scraper://kaize", file_path, file_hash, "scraper"
             )
@@ -522,17 +1024,21 @@ class CacheDownloader:
         try:
             # Initialize and run scraper
             nautiljon = Nautiljon()
+            if HTTP_CACHE:
+                for scraper in nautiljon.scrapers:
+                    enable_http_cache(scraper, self.cache_dir)
 
             # Get data
-            data = nautiljon.get_animes()
+            with self._scrape_journal("nautiljon", Platform.NAUTILJON) as journal:
+                data = nautiljon.get_animes(journal=journal)
 
-            # Save to cache
-            file_path = os.path.join(self.cache_dir, "nautiljon.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
+                # Save to cache
+                entry_path = os.path.join(self.cache_dir, "nautiljon.json")
+                file_hash = write_json(entry_path, data)
+                file_path = cache_path(entry_path)
+                journal.finish()
 
-            # Compute hash and update cache
-            file_hash = self._compute_file_hash(file_path)
+            # Update cache
             self._update_download_cache(
                 "scraper://nautiljon", file_path, file_hash, "scraper"
             )
@@ -544,24 +1050,60 @@ class CacheDownloader:
             pprint.print(Platform.NAUTILJON, Status.ERR, f"Error running scraper: {e}")
             return None
 
-    def _run_otakotaku_scraper(self) -> Optional[str]:
-        """Run Otak Otaku scraper and save data."""
+    def _run_otakotaku_scraper(self, ignore_cache: bool = False) -> Optional[str]:
+        """Run Otak Otaku scraper and save data.
+
+        The previous data is refreshed incrementally when possible; a full
+        sweep runs on the first run, every ``OTAKOTAKU_FULL_SWEEP_DAYS`` days
+        and when `ignore_cache` is set.
+        """
         pprint.print(Platform.OTAKOTAKU, Status.INFO, "Running scraper...")
 
         try:
+            entry_path = os.path.join(self.cache_dir, "otakotaku.json")
+            state = self._load_scraper_state("otakotaku", Platform.OTAKOTAKU)
+            tombstones = {int(k): v for k, v in state.get("tombstones", {}).items()}
+
+            previous = None
+            last_full_sweep = state.get("last_full_sweep")
+            if (
+                OTAKOTAKU_INCREMENTAL
+                and not ignore_cache
+                and last_full_sweep
+                and datetime.now() - datetime.fromisoformat(last_full_sweep)
+                < timedelta(days=OTAKOTAKU_FULL_SWEEP_DAYS)
+                and resolve_cached(entry_path)
+            ):
+                with open_cached(entry_path) as f:
+                    previous = json.load(f)
+
             # Initialize and run scraper
             otakotaku = OtakOtaku()
+            if HTTP_CACHE:
+                enable_http_cache(otakotaku.session, self.cache_dir)
+
+            # Get data; IDs are checkpointed in batches, there are many of them
+            with self._scrape_journal(
+                "otakotaku", Platform.OTAKOTAKU, batch_size=100
+            ) as journal:
+                data = otakotaku.get_anime(
+                    previous=previous, tombstones=tombstones, journal=journal
+                )
 
-            # Get data
-            data = otakotaku.get_anime()
+                # Save to cache
+                file_hash = write_json(entry_path, data)
+                file_path = cache_path(entry_path)
+                journal.finish()
 
-            # Save to cache
-            file_path = os.path.join(self.cache_dir, "otakotaku.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False)
+            if not previous:
+                last_full_sweep = datetime.now().isoformat()
+            state = {
+                "last_full_sweep": last_full_sweep,
+                "tombstones": {str(k): v for k, v in sorted(tombstones.items())},
+            }
+            self._save_scraper_state("otakotaku", state)
 
-            # Compute hash and update cache
-            file_hash = self._compute_file_hash(file_path)
+            # Update cache
             self._update_download_cache(
                 "scraper://otakotaku", file_path, file_hash, "scraper"
             )
@@ -573,19 +1115,64 @@ class CacheDownloader:
             pprint.print(Platform.OTAKOTAKU, Status.ERR, f"Error running scraper: {e}")
             return None
 
+    @contextmanager
+    def _scrape_journal(
+        self, name: str, platform: Platform, batch_size: int = 1
+    ) -> Generator[ScrapeJournal, None, None]:
+        """Open the checkpoint journal of a scraper.
+
+        The scraper calls `ScrapeJournal.finish` once its data is saved; if
+        it fails before that, the journal is kept for the next run to resume.
+        """
+        journal = ScrapeJournal(self.cache_dir, name, platform, batch_size)
+        try:
+            yield journal
+        finally:
+            journal.close()
+
+    def _load_scraper_state(self, name: str, platform: Platform) -> Dict[str, Any]:
+        """Load the state a scraper kept from its previous run, or an empty one."""
+        state_path = os.path.join(
+            self.cache_dir, SCRAPER_STATE_FILENAME.format(name=name)
+        )
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            pprint.print(
+                platform, Status.WARN, f"Ignoring unreadable scraper state: {e}"
+            )
+            return {}
+
+    def _save_scraper_state(self, name: str, state: Dict[str, Any]) -> None:
+        """Atomically store the state of a scraper for its next run."""
+        state_path = os.path.join(
+            self.cache_dir, SCRAPER_STATE_FILENAME.format(name=name)
+        )
+        with atomic_write(state_path) as writer:
+            writer.write(json.dumps(state, indent=2).encode("utf-8"))
+
 
 # Compatibility functions for pipeline
 def download_github_files(
-    connection: DatabaseConnection, cache_dir: str = "src/cache"
+    cache: DownloadCacheStore, cache_dir: str = "src/cache"
 ) -> List[str]:
     """Download GitHub files and return list of downloaded file paths."""
-    downloader = CacheDownloader(connection, cache_dir)
-    return downloader.download_github_files()
+    downloader = CacheDownloader(cache, cache_dir)
+    try:
+        return downloader.download_github_files()
+    finally:
+        cache.flush()
 
 
 def download_external_files(
-    connection: DatabaseConnection, cache_dir: str = "src/cache"
+    cache: DownloadCacheStore, cache_dir: str = "src/cache"
 ) -> List[str]:
     """Run scrapers and return list of scraped file paths."""
-    downloader = CacheDownloader(connection, cache_dir)
-    return downloader.run_scrapers()
+    downloader = CacheDownloader(cache, cache_dir)
+    try:
+        return downloader.run_scrapers()
+    finally:
+        cache.flush()
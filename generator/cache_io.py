@@ -0,0 +1,325 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Helpers for reading and writing files in the download cache.
+Writes are streamed, hashed on the fly and atomically moved into place.
+Entries are optionally stored zstd-compressed and decompressed on read.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Generator, Optional, TextIO, Tuple
+
+import requests
+import zstandard as zstd
+
+from generator.const import CACHE_COMPRESSION, CACHE_STORE
+from generator.hedging import Cancellation, Cancelled
+
+CHUNK_SIZE = 1024 * 1024
+"""Read size used when streaming response bodies to disk"""
+COMPRESSED_SUFFIX = ".zst"
+"""Filename suffix of cache entries stored zstd-compressed"""
+COMPRESSION_LEVEL = 10
+"""zstd level used for cache entries compressed at rest"""
+
+Digest = Tuple[str, str]
+"""Expected digest of a file as ``(algorithm, hexdigest)``; the algorithm
+is ``sha256`` or ``git-blob`` (a GitHub blob SHA)"""
+
+
+class _HashingFile(io.FileIO):
+    """Unbuffered file that hashes and counts the bytes written to it."""
+
+    def __init__(self, fd: int):
+        super().__init__(fd, "wb")
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: Any) -> int:
+        written = super().write(data)
+        self.hasher.update(memoryview(data).cast("B")[:written])
+        self.size += written
+        return written
+
+
+class AtomicWriter:
+    """Binary writer that hashes its input and replaces the target file on commit.
+
+    Data goes to a temporary file next to the target, so an interrupted
+    write never leaves a half-written cache file behind. `file` is the
+    buffered file itself, for writers (e.g. zstd) that need a real one.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+        directory, filename = os.path.split(os.path.abspath(file_path))
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{filename}.", suffix=".tmp"
+        )
+        self._raw = _HashingFile(fd)
+        self.file: BinaryIO = io.BufferedWriter(self._raw)
+
+    def write(self, data: bytes) -> int:
+        """Write a chunk; it is hashed on its way to disk."""
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        """Flush buffered data to the temporary file."""
+        self.file.flush()
+
+    @property
+    def size(self) -> int:
+        """Number of bytes written so far."""
+        if not self.file.closed:
+            self.file.flush()
+        return self._raw.size
+
+    def hexdigest(self) -> str:
+        """SHA256 of everything written so far."""
+        if not self.file.closed:
+            self.file.flush()
+        return self._raw.hasher.hexdigest()
+
+    def finish(self) -> None:
+        """Flush, fsync and close the temporary file without moving it."""
+        if self.file.closed:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def commit(self) -> None:
+        """Flush, fsync and atomically rename the temporary file over the target."""
+        self.finish()
+        os.replace(self.temp_path, self.file_path)
+
+    def discard(self) -> None:
+        """Drop the temporary file, leaving the target untouched."""
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+
+@contextmanager
+def atomic_write(file_path: str) -> Generator[AtomicWriter, None, None]:
+    """Open an `AtomicWriter` that commits on success and discards on error."""
+    writer = AtomicWriter(file_path)
+    try:
+        yield writer
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+
+
+class CacheEntryWriter:
+    """Writer for a single cache entry, compressed at rest when enabled.
+
+    With compression on, the entry is stored as ``<name>.zst`` and any stale
+    uncompressed copy is removed on commit (and vice versa), so exactly one
+    variant of each entry exists on disk. Input that is already zstd
+    compressed (``precompressed``) is stored as-is or decompressed,
+    depending on the cache mode. With ``CACHE_STORE=objects`` the entry is
+    committed to the content-addressed store and its name becomes a symlink.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        compress: Optional[bool] = None,
+        precompressed: bool = False,
+    ):
+        if compress is None:
+            compress = CACHE_COMPRESSION == "zstd"
+
+        self.path = cache_path(file_path, compress)
+        self._stale_path = cache_path(file_path, not compress)
+        self._target = AtomicWriter(self.path)
+
+        self._stream: BinaryIO
+        if compress and not precompressed:
+            self._stream = zstd.ZstdCompressor(level=COMPRESSION_LEVEL).stream_writer(
+                self._target.file, closefd=False
+            )
+        elif precompressed and not compress:
+            self._stream = zstd.ZstdDecompressor().stream_writer(
+                self._target.file, closefd=False
+            )
+        else:
+            self._stream = self._target.file
+
+    def write(self, data: bytes) -> int:
+        """Write a chunk of (uncompressed, unless precompressed) entry data."""
+        return self._stream.write(data)
+
+    def hexdigest(self) -> str:
+        """SHA256 of the bytes stored on disk."""
+        return self._target.hexdigest()
+
+    def commit(self) -> None:
+        """Finish the zstd frame if any, move the entry into place and drop stale copies."""
+        if self._stream is not self._target.file:
+            self._stream.close()
+
+        if CACHE_STORE == "objects":
+            # blob_store builds on the writers in this module
+            from generator.blob_store import get_store
+
+            get_store(os.path.dirname(self.path)).add(self._target, self.path)
+            return
+
+        self._target.commit()
+        if os.path.lexists(self._stale_path):
+            os.unlink(self._stale_path)
+
+    def discard(self) -> None:
+        """Drop the partially written entry."""
+        self._target.discard()
+
+
+@contextmanager
+def cache_write(
+    file_path: str,
+    compress: Optional[bool] = None,
+    precompressed: bool = False,
+    cancelled: Optional[threading.Event] = None,
+) -> Generator[CacheEntryWriter, None, None]:
+    """Open a `CacheEntryWriter` that commits on success and discards on error.
+
+    A set `cancelled` discards the entry with `Cancelled` instead of
+    committing it; a hedging `Cancellation` also refuses the commit once
+    another attempt committed first.
+    """
+    writer = CacheEntryWriter(file_path, compress, precompressed)
+    try:
+        yield writer
+        if isinstance(cancelled, Cancellation):
+            cancelled.commit(writer.commit)
+        elif cancelled is not None and cancelled.is_set():
+            raise Cancelled(file_path)
+        else:
+            writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+
+
+def cache_path(file_path: str, compress: Optional[bool] = None) -> str:
+    """Get the on-disk path of a cache entry for the given (or configured) mode."""
+    if compress is None:
+        compress = CACHE_COMPRESSION == "zstd"
+    return f"{file_path}{COMPRESSED_SUFFIX}" if compress else file_path
+
+
+def resolve_cached(file_path: str) -> Optional[str]:
+    """Find the on-disk variant of a cache entry, compressed or not."""
+    for candidate in (cache_path(file_path, True), file_path):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def open_cached(file_path: str) -> TextIO:
+    """Open a cache entry for reading as text, decompressing it transparently.
+
+    `file_path` is the uncompressed name of the entry (e.g. ``cache/aod.json``);
+    a ``.zst`` variant is used when that is what is stored on disk.
+    """
+    path = resolve_cached(file_path)
+    if path is None:
+        raise FileNotFoundError(file_path)
+
+    if path.endswith(COMPRESSED_SUFFIX):
+        # Entries stored as-is from upstream may hold several frames
+        reader = zstd.ZstdDecompressor().stream_reader(
+            open(path, "rb"), read_across_frames=True
+        )
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def list_cached(cache_dir: str) -> Dict[str, str]:
+    """List cached JSON entries by their uncompressed filename.
+
+    Values are the uncompressed paths, suitable for `open_cached`.
+    """
+    cache_files = {}
+    if not os.path.exists(cache_dir):
+        return cache_files
+
+    for filename in os.listdir(cache_dir):
+        # Hidden files are bookkeeping (manifest, in-flight writes), not data
+        if filename.startswith("."):
+            continue
+        if filename.endswith(COMPRESSED_SUFFIX):
+            filename = filename[: -len(COMPRESSED_SUFFIX)]
+        if filename.endswith(".json"):
+            cache_files[filename] = os.path.join(cache_dir, filename)
+
+    return cache_files
+
+
+def digest_hasher(algorithm: str, size: int) -> Any:
+    """Create a hasher for `algorithm`, primed for a body of `size` bytes."""
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "git-blob":
+        hasher = hashlib.sha1()
+        hasher.update(f"blob {size}\0".encode())
+        return hasher
+    raise ValueError(f"Unsupported digest algorithm: {algorithm}")
+
+
+def hash_file(file_path: str, algorithm: str = "sha256") -> str:
+    """Hash a file in a single pass over a memory map.
+
+    Hashing releases the GIL, so several files can be hashed in parallel
+    from a thread pool.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        hasher = digest_hasher(algorithm, size)
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+    return hasher.hexdigest()
+
+
+def stream_to_file(
+    response: requests.Response,
+    file_path: str,
+    precompressed: bool = False,
+    cancelled: Optional[threading.Event] = None,
+) -> str:
+    """Stream a response body into the cache entry `file_path` in one pass.
+
+    The response should be opened with ``stream=True`` so the body is never
+    held in memory as a whole. Set `precompressed` for zstd bodies, which are
+    then stored as-is or piped through a decompressor depending on the cache
+    mode. Setting `cancelled` abandons the write with `Cancelled`. Returns
+    the SHA256 of the stored bytes.
+    """
+    with cache_write(
+        file_path, precompressed=precompressed, cancelled=cancelled
+    ) as writer:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if cancelled is not None and cancelled.is_set():
+                raise Cancelled(file_path)
+            writer.write(chunk)
+    return writer.hexdigest()
+
+
+def write_json(file_path: str, data: Any) -> str:
+    """Atomically write `data` as UTF-8 JSON into the cache and return its SHA256."""
+    with cache_write(file_path) as writer:
+        writer.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+    return writer.hexdigest()
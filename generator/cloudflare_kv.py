@@ -6,10 +6,11 @@ Cloudflare Workers KV client for Python
 """
 
 import json
-import requests
 from typing import Any, Dict, List, Optional
 from urllib.parse import quote
 
+from generator.transport import get_session
+
 
 class CloudflareKV:
     """Client for Cloudflare Workers KV REST API"""
@@ -30,11 +31,13 @@ class CloudflareKV:
             "Authorization": f"Bearer {auth_token}",
             "Content-Type": "application/json"
         }
+        # Reuse pooled keep-alive connections across batches
+        self.session = get_session()
         
     def get(self, key: str) -> Optional[str]:
         """Get a value by key"""
         url = f"{self.base_url}/values/{quote(key, safe='')}"
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, headers=self.headers)
         
         if response.status_code == 404:
             return None
@@ -50,7 +53,7 @@ class CloudflareKV:
         if expiration_ttl:
             params["expiration_ttl"] = expiration_ttl
             
-        response = requests.put(
+        response = self.session.put(
             url, 
             data=value,
             headers={**self.headers, "Content-Type": "text/plain"},
@@ -63,13 +66,13 @@ class CloudflareKV:
         if len(keys) == 1:
             # Single key deletion
             url = f"{self.base_url}/values/{quote(keys[0], safe='')}"
-            response = requests.delete(url, headers=self.headers)
+            response = self.session.delete(url, headers=self.headers)
             return response.status_code in (200, 404)
         else:
             # Bulk deletion
             url = f"{self.base_url}/bulk"
             data = json.dumps([{"key": key, "action": "delete"} for key in keys])
-            response = requests.put(url, data=data, headers=self.headers)
+            response = self.session.put(url, data=data, headers=self.headers, timeout=120)
             return response.status_code == 200
     
     def mset(self, mapping: Dict[str, str]) -> bool:
@@ -91,10 +94,12 @@ class CloudflareKV:
         batch_size = 10000
         for i in range(0, len(operations), batch_size):
             batch = operations[i:i + batch_size]
-            response = requests.put(
+            response = self.session.put(
                 url,
                 json=batch,
-                headers=self.headers
+                headers=self.headers,
+                # Bulk batches can hold up to 10000 values
+                timeout=120
             )
             if response.status_code != 200:
                 return False
@@ -108,7 +113,7 @@ class CloudflareKV:
         if prefix:
             params["prefix"] = prefix
             
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.session.get(url, headers=self.headers, params=params)
         if response.status_code == 200:
             return response.json().get("result", [])
         return []
@@ -127,7 +132,7 @@ class CloudflareKV:
             if cursor:
                 params["cursor"] = cursor
                 
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
             if response.status_code != 200:
                 return False
                 
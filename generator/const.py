@@ -26,6 +26,8 @@ KAIZE_EMAIL = os.getenv("KAIZE_EMAIL")
 """User email for Kaize login"""
 KAIZE_PASSWORD = os.getenv("KAIZE_PASSWORD")
 """User password for Kaize login"""
+KAIZE_SESSION_FILE = os.getenv("KAIZE_SESSION_FILE", "")
+"""File keeping the Kaize login cookies between runs; empty logs in every run"""
 
 # GitHub Actions detection
 GITHUB_DISPATCH = os.getenv("GITHUB_EVENT_NAME") == "workflow_dispatch"
@@ -36,7 +38,7 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 """GitHub API token for authenticated requests"""
 
 # PostgreSQL database configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = os.getenv("DATABASE_URL", "")
 """PostgreSQL database URL for serverless PostgreSQL connection"""
 
 
@@ -51,16 +53,114 @@ def process_database_url(url: str | None = None) -> str:
     return url
 
 
-# Process the URL
-DATABASE_URL = process_database_url(DATABASE_URL)
-
 # Cache configuration
 CACHE_DIR = os.getenv("CACHE_DIR", "cache")
 """Cache directory for downloaded files"""
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "none")
+"""How cache files are stored on disk: `none` (raw JSON) or `zstd` (compressed)"""
+CACHE_STORE = os.getenv("CACHE_STORE", "files")
+"""How cache entries are laid out: `files` (overwritten in place) or `objects` (content-addressed with history)"""
+CACHE_GENERATIONS = int(os.getenv("CACHE_GENERATIONS", "3"))
+"""Number of generations kept per cache entry in the object store"""
+CACHE_MAX_AGE_DAYS = int(os.getenv("CACHE_MAX_AGE_DAYS", "30"))
+"""Age after which old generations are evicted from the object store, 0 to disable"""
+CACHE_MAX_SIZE_MB = int(os.getenv("CACHE_MAX_SIZE_MB", "0"))
+"""Size the object store is trimmed to by evicting old generations, 0 for no limit"""
 
 # Scraper cache expiry
 SCRAPER_CACHE_EXPIRY_DAYS = int(os.getenv("SCRAPER_CACHE_EXPIRY_DAYS", "14"))
 """Number of days to cache scraper data before re-running"""
+SCRAPER_RESUME = os.getenv("SCRAPER_RESUME", "true").lower() == "true"
+"""Resume interrupted scrapes from their checkpoint journal"""
+SCRAPER_RESUME_MAX_AGE_HOURS = int(os.getenv("SCRAPER_RESUME_MAX_AGE_HOURS", "24"))
+"""Checkpoint journals started longer ago than this are discarded"""
+
+# Scraper HTML parsing
+HTML_PARSER = os.getenv("HTML_PARSER", "auto").lower()
+"""HTML parser backend of the scrapers: auto, lxml or bs4"""
+PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", str(os.cpu_count() or 1)))
+"""Processes parsing scraped pages, shared by all scrapers; 0 parses in the download threads"""
+
+# Shared HTTP transport
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+"""Default timeout in seconds for HTTP requests that do not set their own"""
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+"""Number of retries for failed connections and 429/5xx responses"""
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+"""Exponential backoff factor in seconds between HTTP retries"""
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+"""Number of keep-alive connections pooled per host"""
+HTTP_CACHE = os.getenv("HTTP_CACHE", "true").lower() == "true"
+"""Revalidate scraper page fetches against an on-disk response cache"""
+HTTP_CACHE_MAX_AGE_DAYS = int(os.getenv("HTTP_CACHE_MAX_AGE_DAYS", "30"))
+"""Days a cached response is kept after it was last used, 0 to disable"""
+HTTP_CACHE_MAX_SIZE_MB = int(os.getenv("HTTP_CACHE_MAX_SIZE_MB", "512"))
+"""Size the response cache is trimmed to, least recently used first, 0 for no limit"""
+RATE_LIMITS = os.getenv(
+    "RATE_LIMITS", "kaize.io=4/4,nautiljon.com=2/3,otakotaku.com=20/20"
+)
+"""Per-host request rate limits as ``host=requests_per_second[/burst],...``"""
+
+# OtakOtaku crawl concurrency
+OTAKOTAKU_CONCURRENCY = int(os.getenv("OTAKOTAKU_CONCURRENCY", "4"))
+"""Concurrent OtakOtaku requests at the start of a crawl"""
+OTAKOTAKU_MAX_CONCURRENCY = int(os.getenv("OTAKOTAKU_MAX_CONCURRENCY", "32"))
+"""Upper bound for the adaptive OtakOtaku concurrency"""
+OTAKOTAKU_INCREMENTAL = os.getenv("OTAKOTAKU_INCREMENTAL", "true").lower() == "true"
+"""Refresh the previous OtakOtaku data instead of crawling every ID"""
+OTAKOTAKU_FULL_SWEEP_DAYS = int(os.getenv("OTAKOTAKU_FULL_SWEEP_DAYS", "30"))
+"""Days between full OtakOtaku sweeps when running incrementally"""
+OTAKOTAKU_RECHECK_WINDOW = int(os.getenv("OTAKOTAKU_RECHECK_WINDOW", "500"))
+"""Most recent known OtakOtaku IDs re-fetched by an incremental run"""
+OTAKOTAKU_RECHECK_SAMPLE = int(os.getenv("OTAKOTAKU_RECHECK_SAMPLE", "200"))
+"""Older OtakOtaku IDs re-fetched at random by an incremental run"""
+OTAKOTAKU_TOMBSTONE_AFTER = int(os.getenv("OTAKOTAKU_TOMBSTONE_AFTER", "3"))
+"""Consecutive empty answers after which an OtakOtaku ID is skipped"""
+
+# Kaize last page search
+KAIZE_PAGE_PROBES = int(os.getenv("KAIZE_PAGE_PROBES", "4"))
+"""Kaize listing pages probed concurrently per round of the last page search"""
+
+# Nautiljon session pool
+NAUTILJON_SESSIONS = int(os.getenv("NAUTILJON_SESSIONS", "3"))
+"""Independent Nautiljon sessions fetching listing pages at once"""
+
+# Download phase concurrency
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+"""Number of sources checked and downloaded concurrently"""
+DOWNLOAD_CONCURRENT_SOURCES = (
+    os.getenv("DOWNLOAD_CONCURRENT_SOURCES", "true").lower() == "true"
+)
+"""Run the scrapers and the GitHub downloads at the same time"""
+DOWNLOAD_MAX_PER_HOST = int(os.getenv("DOWNLOAD_MAX_PER_HOST", "4"))
+"""Maximum number of concurrent requests against a single host"""
+DOWNLOAD_REVALIDATION = os.getenv("DOWNLOAD_REVALIDATION", "sha")
+"""How GitHub files are checked for changes: `sha` (contents API) or `conditional` (ETag/Last-Modified)"""
+DOWNLOAD_RESUMABLE = os.getenv("DOWNLOAD_RESUMABLE", "true").lower() == "true"
+"""Whether downloads keep a partial file and resume it with a ranged request"""
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+"""Number of times an interrupted resumable download is resumed within a run"""
+DOWNLOAD_HEDGING = os.getenv("DOWNLOAD_HEDGING", "false").lower() == "true"
+"""Whether slow GitHub downloads are raced against the jsDelivr mirror"""
+DOWNLOAD_HEDGE_DELAY = float(os.getenv("DOWNLOAD_HEDGE_DELAY", "2"))
+"""Seconds a GitHub download may take before the mirror is tried as well"""
+DOWNLOAD_BACKEND = os.getenv("DOWNLOAD_BACKEND", "http")
+"""How repository-hosted files are fetched: `http` (raw files) or `git` (shallow clones)"""
+DOWNLOAD_GIT_REPOS = [
+    repo.strip().lower()
+    for repo in os.getenv(
+        "DOWNLOAD_GIT_REPOS",
+        "kawaiioverflow/arm,rensetsu/db.trakt.anitrakt,Fribb/anime-lists,nattadasu/animeApi",
+    ).split(",")
+    if repo.strip()
+]
+"""Repositories (`account/repo`) fetched with git when `DOWNLOAD_BACKEND=git`"""
+DOWNLOAD_VERIFY = os.getenv("DOWNLOAD_VERIFY", "true").lower() == "true"
+"""Whether cached files are checked against their recorded hashes before downloading"""
+DOWNLOAD_CACHE_BACKEND = os.getenv("DOWNLOAD_CACHE_BACKEND", "database")
+"""Where download cache state lives: `database` (download_cache table) or `manifest` (local file)"""
+DOWNLOAD_CACHE_MIRROR = os.getenv("DOWNLOAD_CACHE_MIRROR", "true").lower() == "true"
+"""Whether the local manifest is mirrored to the download_cache table after downloading"""
 
 # Cloudflare Workers KV configuration
 CLOUDFLARE_ACCOUNT_ID = os.getenv("CLOUDFLARE_ACCOUNT_ID")
@@ -11,12 +11,12 @@ Parses JSON files and extracts individual fields for database storage.
 """
 
 import json
-import os
 from typing import List, Dict, Optional
 
 from generator.const import pprint
 from generator.prettyprint import Platform, Status
 from generator.anime_record import AnimeRecord
+from generator.cache_io import open_cached, resolve_cached
 
 
 class DataExtractor:
@@ -84,11 +84,11 @@ class DataExtractor:
 
     def _load_aod_data(self, aod_file: Optional[str]) -> List[Dict]:
         """Load anime offline database data."""
-        if not aod_file or not os.path.exists(aod_file):
+        if not aod_file or not resolve_cached(aod_file):
             return []
 
         try:
-            with open(aod_file, "r", encoding="utf-8") as f:
+            with open_cached(aod_file) as f:
                 data = json.load(f)
 
             # AOD structure: {"data": [...]}
@@ -176,11 +176,11 @@ class DataExtractor:
 
     def _load_platform_data(self, file_path: str, filename: str) -> List[Dict]:
         """Load platform-specific data file."""
-        if not os.path.exists(file_path):
+        if not resolve_cached(file_path):
             return []
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
+            with open_cached(file_path) as f:
                 data = json.load(f)
 
             # Handle different file structures
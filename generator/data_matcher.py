@@ -21,6 +21,7 @@ from slugify import slugify
 from generator.const import pprint
 from generator.prettyprint import Platform, Status
 from generator.anime_record import AnimeRecord
+from generator.cache_io import open_cached, resolve_cached
 
 
 class DataMatcher:
@@ -78,9 +79,9 @@ class DataMatcher:
 
         for platform, filename in platform_files.items():
             filepath = os.path.join(self.cache_dir, filename)
-            if os.path.exists(filepath):
+            if resolve_cached(filepath):
                 try:
-                    with open(filepath, "r", encoding="utf-8") as f:
+                    with open_cached(filepath) as f:
                         raw_data = json.load(f)
 
                         # Handle different JSON structures
@@ -130,9 +131,9 @@ class DataMatcher:
 
         for filename in manual_files:
             filepath = os.path.join(self.cache_dir, filename)
-            if os.path.exists(filepath):
+            if resolve_cached(filepath):
                 try:
-                    with open(filepath, "r", encoding="utf-8") as f:
+                    with open_cached(filepath) as f:
                         platform = filename.replace("_manual.json", "")
                         self.manual_mappings[platform] = json.load(f)
                 except Exception as e:
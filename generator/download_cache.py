@@ -0,0 +1,280 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Download cache storage: the `download_cache` table or a local manifest file.
+Both load every entry up front and write all changes back at once.
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+
+from generator.cache_io import atomic_write
+from generator.models import DownloadCache
+
+MANIFEST_FILENAME = ".manifest.json"
+"""Name of the local download cache manifest inside the cache directory"""
+
+
+@dataclass
+class CacheEntry:
+    """Cached state of a single download source."""
+
+    source_type: str
+    source_url: str
+    file_path: str
+    file_hash: str
+    expires_at: Optional[datetime] = None
+    metadata: Dict[str, str] = field(default_factory=dict)
+    downloaded_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialise the entry for the manifest file."""
+        return {
+            "source_type": self.source_type,
+            "source_url": self.source_url,
+            "file_path": self.file_path,
+            "file_hash": self.file_hash,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "metadata": self.metadata,
+            "downloaded_at": self.downloaded_at.isoformat()
+            if self.downloaded_at
+            else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CacheEntry":
+        """Deserialise an entry from the manifest file."""
+        return cls(
+            source_type=data["source_type"],
+            source_url=data["source_url"],
+            file_path=data["file_path"],
+            file_hash=data["file_hash"],
+            expires_at=datetime.fromisoformat(data["expires_at"])
+            if data.get("expires_at")
+            else None,
+            metadata=data.get("metadata") or {},
+            downloaded_at=datetime.fromisoformat(data["downloaded_at"])
+            if data.get("downloaded_at")
+            else None,
+        )
+
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        """Whether the entry has an expiry date that has passed."""
+        return self.expires_at is not None and self.expires_at < (now or datetime.now())
+
+
+class DownloadCacheStore(ABC):
+    """In-memory view of the download cache with deferred write-back.
+
+    Every entry is read on first use and kept in memory; changes are only
+    persisted when `flush` is called. Safe to use from concurrent download
+    threads. Subclasses must implement `_read` and `_write`.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, CacheEntry] = {}
+        self._dirty: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def load(self) -> None:
+        """Read every cache entry from storage."""
+        with self._lock:
+            self._entries = {entry.source_url: entry for entry in self._read()}
+            self._dirty.clear()
+            self._deleted.clear()
+            self._loaded = True
+
+    def get(self, source_url: str) -> Optional[CacheEntry]:
+        """Get the cached state of a source, if any."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            return self._entries.get(source_url)
+
+    def all(self) -> List[CacheEntry]:
+        """Get every cached entry."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            return list(self._entries.values())
+
+    def upsert(self, entry: CacheEntry) -> None:
+        """Insert or replace the cached state of a source."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            if entry.downloaded_at is None:
+                entry.downloaded_at = datetime.now()
+            self._entries[entry.source_url] = entry
+            self._dirty.add(entry.source_url)
+            self._deleted.discard(entry.source_url)
+
+    def remove(self, source_url: str) -> None:
+        """Forget the cached state of a source."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            if self._entries.pop(source_url, None) is not None:
+                self._dirty.discard(source_url)
+                self._deleted.add(source_url)
+
+    def expire(self, now: Optional[datetime] = None) -> List[str]:
+        """Drop entries whose expiry date has passed and return their URLs."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            expired = [
+                url for url, entry in self._entries.items() if entry.is_expired(now)
+            ]
+            for url in expired:
+                del self._entries[url]
+                self._dirty.discard(url)
+                self._deleted.add(url)
+            return expired
+
+    def replace_all(self, entries: List[CacheEntry]) -> None:
+        """Make this store mirror `entries`, e.g. another store's contents."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            incoming = {entry.source_url: entry for entry in entries}
+            for url in set(self._entries) - set(incoming):
+                del self._entries[url]
+                self._dirty.discard(url)
+                self._deleted.add(url)
+            for url, entry in incoming.items():
+                if self._entries.get(url) != entry:
+                    self._entries[url] = entry
+                    self._dirty.add(url)
+                    self._deleted.discard(url)
+
+    def flush(self) -> None:
+        """Persist all pending changes at once."""
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                return
+            self._write()
+            self._dirty.clear()
+            self._deleted.clear()
+
+    @abstractmethod
+    def _read(self) -> List[CacheEntry]:
+        """Read every entry from storage."""
+
+    @abstractmethod
+    def _write(self) -> None:
+        """Persist the dirty and deleted entries."""
+
+
+class DownloadCacheRepository(DownloadCacheStore):
+    """Download cache backed by the `download_cache` table.
+
+    All rows are read with a single query and all changes are written back
+    in one transaction.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        super().__init__()
+        self.Session = session_factory
+
+    def _read(self) -> List[CacheEntry]:
+        with self.Session() as session:
+            rows = session.execute(select(DownloadCache)).scalars().all()
+            return [self._to_entry(row) for row in rows]
+
+    def _write(self) -> None:
+        with self.Session() as session:
+            if self._deleted:
+                session.execute(
+                    delete(DownloadCache).where(
+                        DownloadCache.source_url.in_(self._deleted)
+                    )
+                )
+
+            if self._dirty:
+                rows = session.execute(
+                    select(DownloadCache).where(
+                        DownloadCache.source_url.in_(self._dirty)
+                    )
+                ).scalars()
+                existing: Dict[str, DownloadCache] = {}
+                for row in rows:
+                    if row.source_url in existing:
+                        # Collapse duplicate rows for the same source
+                        session.delete(row)
+                    else:
+                        existing[row.source_url] = row
+
+                for url in self._dirty:
+                    entry = self._entries[url]
+                    row = existing.get(url)
+                    if row is None:
+                        row = DownloadCache(source_url=url)
+                        session.add(row)
+                    self._apply(row, entry)
+
+            session.commit()
+
+    @staticmethod
+    def _to_entry(row: DownloadCache) -> CacheEntry:
+        metadata: Dict[str, str] = {}
+        if row.file_metadata:
+            try:
+                metadata = json.loads(row.file_metadata)
+            except ValueError:
+                pass
+        return CacheEntry(
+            source_type=row.source_type,
+            source_url=row.source_url,
+            file_path=row.file_path,
+            file_hash=row.file_hash,
+            expires_at=row.expires_at,
+            metadata=metadata,
+            downloaded_at=row.downloaded_at,
+        )
+
+    @staticmethod
+    def _apply(row: DownloadCache, entry: CacheEntry) -> None:
+        row.source_type = entry.source_type
+        row.file_path = entry.file_path
+        row.file_hash = entry.file_hash
+        row.expires_at = entry.expires_at
+        row.file_metadata = json.dumps(entry.metadata) if entry.metadata else None
+        if entry.downloaded_at is not None:
+            row.downloaded_at = entry.downloaded_at
+
+
+class CacheManifest(DownloadCacheStore):
+    """Download cache kept in a JSON manifest next to the cache files.
+
+    Needs no database connection, so the download phase can run offline or
+    while the database is still starting up.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _read(self) -> List[CacheEntry]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [CacheEntry.from_dict(item) for item in data.get("entries", [])]
+
+    def _write(self) -> None:
+        entries = sorted(self._entries.values(), key=lambda entry: entry.source_url)
+        data = {"entries": [entry.to_dict() for entry in entries]}
+        with atomic_write(self.path) as writer:
+            writer.write(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Git fetch backend for repository-hosted sources.
+Keeps a shallow bare clone of each repository under the cache and updates it
+with ``git fetch``, so after the first run only packfile deltas are
+transferred. Files are read straight from the object store into the cache,
+without a working tree.
+"""
+
+import os
+import subprocess
+from typing import List, Optional
+
+from generator.cache_io import CHUNK_SIZE, cache_write
+
+REPOS_DIR = "repos"
+"""Directory inside the cache directory that holds the clones"""
+
+
+class GitError(Exception):
+    """Raised when a git command fails."""
+
+
+class GitMirror:
+    """Shallow, single-branch bare clone of a GitHub repository."""
+
+    def __init__(self, cache_dir: str, account: str, repo: str, branch: str):
+        self.path = os.path.join(cache_dir, REPOS_DIR, f"{account}_{repo}.git")
+        self.url = f"https://github.com/{account}/{repo}.git"
+        self.branch = branch
+        self.name = f"{account}/{repo}"
+
+    def update(self) -> str:
+        """Fetch the tip of the branch and return its commit SHA.
+
+        The first call clones the tip; later calls only receive the objects
+        that changed, as deltas against what is already stored.
+        """
+        if not os.path.exists(os.path.join(self.path, "HEAD")):
+            os.makedirs(self.path, exist_ok=True)
+            self._git("init", "--bare", "--quiet")
+            self._git("remote", "add", "origin", self.url)
+
+        self._git(
+            "fetch",
+            "--quiet",
+            "--depth=1",
+            "--no-tags",
+            "origin",
+            f"+refs/heads/{self.branch}:refs/heads/{self.branch}",
+        )
+        # Drop superseded objects now and then so the clone stays small
+        self._git("gc", "--auto", "--quiet", "--prune=now")
+        return self._git("rev-parse", f"refs/heads/{self.branch}").strip()
+
+    def blob_sha(self, filepath: str) -> Optional[str]:
+        """Get the blob SHA of a file at the fetched tip, or None if it is missing."""
+        try:
+            return self._git(
+                "rev-parse",
+                "--verify",
+                "--quiet",
+                f"refs/heads/{self.branch}:{filepath}",
+            ).strip()
+        except GitError:
+            return None
+
+    def copy_blob(self, sha: str, entry_path: str) -> str:
+        """Stream a blob into the cache entry `entry_path` and return the stored SHA256."""
+        process = subprocess.Popen(
+            ["git", "-C", self.path, "cat-file", "blob", sha],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        stdout, stderr = process.stdout, process.stderr
+        assert stdout is not None and stderr is not None
+        try:
+            with cache_write(entry_path) as writer:
+                for chunk in iter(lambda: stdout.read(CHUNK_SIZE), b""):
+                    writer.write(chunk)
+                # Check before the entry is committed
+                if process.wait() != 0:
+                    raise GitError(
+                        f"git cat-file {sha} failed: {stderr.read().decode().strip()}"
+                    )
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        return writer.hexdigest()
+
+    def _git(self, *args: str) -> str:
+        """Run a git command in the clone and return its output."""
+        command: List[str] = ["git", "-C", self.path, *args]
+        try:
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=600,
+                # Fail instead of waiting for credentials on a missing repo
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+            )
+        except FileNotFoundError as e:
+            raise GitError("git is not installed") from e
+        except subprocess.CalledProcessError as e:
+            raise GitError(
+                f"git {args[0]} failed for {self.name}: {e.stderr.strip()}"
+            ) from e
+        except subprocess.TimeoutExpired as e:
+            raise GitError(f"git {args[0]} timed out for {self.name}") from e
+        return result.stdout
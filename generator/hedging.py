@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Hedged requests: race equivalent attempts against each other.
+The first attempt starts right away; each further one starts only if nothing
+has succeeded within the hedge delay. The first successful result wins and
+the remaining attempts are told to stop. Attempts that write a shared target
+commit through `Cancellation.commit`, so a late loser cannot overwrite it.
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Attempt = Callable[[threading.Event], T]
+"""An attempt receives an event that is set once it is no longer needed"""
+
+
+class Cancelled(Exception):
+    """Raised by an attempt that stopped because another one already won."""
+
+
+class Cancellation(threading.Event):
+    """Event set once hedged attempts are no longer needed.
+
+    It also decides which attempt gets to commit its result: commits run
+    one at a time, and the first one to succeed sets the event, so every
+    later commit is refused.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._commit_lock = threading.Lock()
+
+    def commit(self, action: Callable[[], None]) -> None:
+        """Run `action` unless another attempt won, making this one the winner.
+
+        Raises:
+            Cancelled: Another attempt already committed or won
+        """
+        with self._commit_lock:
+            if self.is_set():
+                raise Cancelled()
+            action()
+            self.set()
+
+
+def hedge(attempts: List[Attempt[T]], delay: float) -> Tuple[int, T]:
+    """Run `attempts` as hedges of each other and return the first success.
+
+    Attempts should check their event regularly (e.g. between chunks) and
+    raise `Cancelled` when it is set, so losers stop using bandwidth. The
+    event is a `Cancellation`; attempts writing the same target commit
+    through it. Losers may still be running when this returns.
+
+    Args:
+        attempts: Equivalent ways to get the result, in order of preference
+        delay: Seconds to wait for a success before starting the next attempt
+
+    Returns:
+        The index of the winning attempt and its result.
+
+    Raises:
+        Exception: The error of the last attempt to fail, if none succeeded
+    """
+    cancelled = Cancellation()
+    executor = ThreadPoolExecutor(max_workers=len(attempts))
+    running: Dict[Future, int] = {}
+    pending = list(enumerate(attempts))
+    error: Optional[BaseException] = None
+
+    try:
+        while pending or running:
+            if pending:
+                index, attempt = pending.pop(0)
+                running[executor.submit(attempt, cancelled)] = index
+
+            # Wait for a result, but hedge if one takes too long. Once every
+            # attempt has started there is nothing left to hedge with.
+            done, _ = wait(
+                running, timeout=delay if pending else None, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                index = running.pop(future)
+                try:
+                    return index, future.result()
+                except Exception as e:
+                    # The next attempt, if any, starts on the next pass
+                    error = e
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    assert error is not None
+    raise error
@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+HTML parser backends for the scraper extraction functions.
+``bs4`` is BeautifulSoup with the pure-Python ``html.parser``; ``lxml`` uses
+libxml2 through lxml and XPath, which is several times faster. Extraction
+functions implement both and must return identical results, which
+tests/test_html_parser.py checks on the pages in tests/fixtures; compare
+them on other saved pages with ``generator parser-bench``.
+"""
+
+from typing import Any, Iterator, Optional
+
+from generator.const import pprint, HTML_PARSER
+from generator.prettyprint import Platform, Status
+
+try:
+    import lxml.html
+
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+BACKENDS = ("bs4", "lxml")
+"""Available backend names"""
+HIDDEN_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+"""Elements whose text BeautifulSoup leaves out of ``get_text``"""
+
+_warned = False
+
+
+def get_backend(name: Optional[str] = None) -> str:
+    """Resolve a backend name, ``HTML_PARSER`` by default.
+
+    ``auto`` picks lxml when it is installed. Asking for lxml without it
+    installed falls back to bs4 with a warning.
+
+    Raises:
+        ValueError: Unknown backend name
+    """
+    global _warned
+    name = (name or HTML_PARSER).lower()
+    if name == "auto":
+        return "lxml" if HAS_LXML else "bs4"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    if name == "lxml" and not HAS_LXML:
+        if not _warned:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                "HTML_PARSER=lxml but lxml is not installed, using bs4",
+            )
+            _warned = True
+        return "bs4"
+    return name
+
+
+def close_open_cells(soup: Any) -> Any:
+    """Make cells that ``html.parser`` nested in an unclosed cell siblings again.
+
+    ``html.parser`` puts a ``<td>`` opened before the previous one is
+    closed inside that cell, while lxml (and browsers) end the previous
+    cell first. Moving every cell of a row back under the row, in document
+    order, gives both backends the same cells. Returns `soup`.
+    """
+    for row in soup.find_all("tr"):
+        cells = [
+            cell for cell in row.find_all(["td", "th"]) if cell.find_parent("tr") is row
+        ]
+        for cell in cells:
+            row.append(cell.extract())
+    return soup
+
+
+def parse_document(html: str) -> Optional[Any]:
+    """Parse a page with lxml, or return None for an empty document."""
+    if not html.strip():
+        return None
+    # Encode first: lxml rejects str input that carries an XML encoding
+    # declaration
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    return lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+
+
+def has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains `name`.
+
+    Same rule as BeautifulSoup's ``class_=`` filter.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def first(element: Any, xpath: str) -> Optional[Any]:
+    """First match of `xpath` under `element`, like BeautifulSoup's ``find``."""
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+
+def strings(element: Any) -> Iterator[str]:
+    """Text pieces of `element` in document order, like BeautifulSoup's.
+
+    Comments and the content of `HIDDEN_TEXT_TAGS` are skipped; the text
+    following them is not.
+    """
+    # Comments and processing instructions have a non-string tag
+    if not isinstance(element.tag, str) or element.tag in HIDDEN_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        yield from strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def text(element: Any) -> str:
+    """Text of `element` like BeautifulSoup's ``text``."""
+    return "".join(strings(element))
+
+
+def stripped_text(element: Any) -> str:
+    """Text of `element` like BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(part.strip() for part in strings(element))
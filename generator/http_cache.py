@@ -0,0 +1,260 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+On-disk HTTP response cache for scraper sessions.
+GET responses that carry an ETag or Last-Modified validator are stored under
+the cache directory. The next request for the same URL is sent as a
+conditional request, and a 304 answer is served from the stored body, so
+unchanged pages cost neither bandwidth nor server work. Cookies are never
+stored, but bodies are, so logged-in sessions should not use the cache.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+import zstandard as zstd
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from generator.cache_io import COMPRESSION_LEVEL, atomic_write
+from generator.const import (
+    CACHE_COMPRESSION,
+    HTTP_CACHE_MAX_AGE_DAYS,
+    HTTP_CACHE_MAX_SIZE_MB,
+)
+from generator.rate_limit import rate_limit_wait, set_rate_limit_wait
+
+HTTP_CACHE_DIR = "http"
+"""Directory inside the cache directory that holds cached responses"""
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+"""Headers that describe the transfer, not the stored (decoded) body"""
+PRIVATE_HEADERS = ("set-cookie", "set-cookie2", "authorization", "www-authenticate")
+"""Headers carrying session credentials, never written to disk"""
+
+
+class ResponseCache:
+    """Cached response bodies and headers, keyed by URL.
+
+    Each entry is one file: a JSON header line followed by the body,
+    zstd-compressed when ``CACHE_COMPRESSION=zstd``. The modification time
+    of a file is when the entry was last stored or served.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_age_days: int = HTTP_CACHE_MAX_AGE_DAYS,
+        max_size_mb: int = HTTP_CACHE_MAX_SIZE_MB,
+    ):
+        self.path = os.path.join(cache_dir, HTTP_CACHE_DIR)
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+    def _entry_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, key[:2], key[2:])
+
+    def load(self, url: str) -> Optional[tuple[Dict[str, Any], bytes]]:
+        """Get the stored metadata and body of a URL, if any."""
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        try:
+            # Mark it as used, so eviction keeps it
+            os.utime(entry_path)
+        except OSError:
+            pass
+        if meta.get("compression") == "zstd":
+            body = zstd.ZstdDecompressor().decompress(body)
+        return meta, body
+
+    def store(self, response: requests.Response) -> None:
+        """Store a complete 200 response that has a validator."""
+        body = response.content
+        meta = {
+            "url": response.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": {
+                key: value
+                for key, value in response.headers.items()
+                if key.lower() not in DROPPED_HEADERS + PRIVATE_HEADERS
+            },
+            "compression": CACHE_COMPRESSION if CACHE_COMPRESSION == "zstd" else None,
+        }
+        if meta["compression"]:
+            body = zstd.ZstdCompressor(level=COMPRESSION_LEVEL).compress(body)
+
+        entry_path = self._entry_path(response.url)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        with atomic_write(entry_path) as writer:
+            writer.write(json.dumps(meta).encode("utf-8") + b"\n")
+            writer.write(body)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Delete entries not used for ``max_age_days``, then the least
+        recently used ones until the cache fits in ``max_size_mb``.
+
+        Returns the number of bytes freed.
+        """
+        now = now or time.time()
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                entry_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+        # Least recently used first
+        entries.sort()
+
+        expired = []
+        if self.max_age_days:
+            cutoff = now - self.max_age_days * 86400
+            expired = [entry for entry in entries if entry[0] < cutoff]
+            entries = entries[len(expired) :]
+        if self.max_size_mb:
+            excess = sum(size for _, size, _ in entries) - self.max_size_mb * 1024**2
+            while excess > 0 and entries:
+                entry = entries.pop(0)
+                expired.append(entry)
+                excess -= entry[1]
+
+        freed = 0
+        for _, size, entry_path in expired:
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+            freed += size
+        return freed
+
+
+class CachedResponse(requests.Response):
+    """A stored 200 response served in place of a 304 answer."""
+
+    from_cache = True
+
+
+class CachingAdapter(BaseAdapter):
+    """Transport adapter that revalidates GET requests against a `ResponseCache`.
+
+    It wraps the adapter a session already uses (e.g. cloudscraper's TLS
+    adapter), so retries, TLS settings and metrics stay as they are.
+    Streamed responses are never stored, since their body may not be read
+    in full, but they are still revalidated against stored entries.
+
+    Args:
+        inner: Adapter that sends the requests
+        cache: Where responses are stored
+    """
+
+    def __init__(self, inner: BaseAdapter, cache: ResponseCache):
+        super().__init__()
+        self.inner = inner
+        self.cache = cache
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Union[float, Tuple[Optional[float], Optional[float]], None] = None,
+        verify: Union[bool, str] = True,
+        cert: Union[str, Tuple[str, str], None] = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        def send(request: requests.PreparedRequest) -> requests.Response:
+            return self.inner.send(
+                request,
+                stream=stream,
+                timeout=timeout,
+                verify=verify,
+                cert=cert,
+                proxies=proxies,
+            )
+
+        if request.method != "GET" or "Range" in request.headers:
+            return send(request)
+
+        url = request.url or ""
+        cached = self.cache.load(url)
+        if cached is not None:
+            meta, _ = cached
+            request = request.copy()
+            if meta.get("etag"):
+                request.headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request.headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = send(request)
+
+        if response.status_code == 304 and cached is not None:
+            return self._from_cache(response, *cached)
+
+        if (
+            response.status_code == 200
+            and not stream
+            and ("ETag" in response.headers or "Last-Modified" in response.headers)
+        ):
+            self.cache.store(response)
+        return response
+
+    @staticmethod
+    def _from_cache(
+        not_modified: requests.Response, meta: Dict[str, Any], body: bytes
+    ) -> requests.Response:
+        """Turn a 304 answer into the stored 200 response."""
+        # Release the connection; the 304 has no body
+        not_modified.content
+
+        response = CachedResponse()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        # Fresh validators and cookies come with the 304
+        for key, value in not_modified.headers.items():
+            if key.lower() not in DROPPED_HEADERS:
+                response.headers[key] = value
+        response.url = meta["url"]
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.request = not_modified.request
+        response.connection = not_modified.connection
+        response.elapsed = not_modified.elapsed
+        set_rate_limit_wait(response, rate_limit_wait(not_modified))
+        # Keep the raw 304 for cookie extraction and retry history
+        response.raw = not_modified.raw
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def enable_http_cache(session: requests.Session, cache_dir: str) -> ResponseCache:
+    """Route a session's GET requests through the response cache of `cache_dir`.
+
+    Every adapter mounted on the session is wrapped in a `CachingAdapter`.
+    Call it after the session is fully set up (e.g. after `instrument`).
+    Responses served from the cache are `CachedResponse` objects, counted
+    as 304 in the transport metrics.
+    """
+    cache = ResponseCache(cache_dir)
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, CachingAdapter):
+            session.mount(prefix, CachingAdapter(adapter, cache))
+    return cache
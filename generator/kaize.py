@@ -5,42 +5,129 @@
 # code from the 'animeApi' project by 'nattadasu'. The original license notices
 # are preserved in the `NOTICE` file in the root of this repository.
 
+import json
+import os
 import re
-import time
-import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Literal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal, Optional
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
 from alive_progress import alive_bar
 from bs4 import BeautifulSoup
-from generator.const import pprint
+from generator.cache_io import atomic_write
+from generator.const import pprint, KAIZE_PAGE_PROBES
+from generator.html_parser import (
+    close_open_cells,
+    first,
+    get_backend,
+    has_class,
+    parse_document,
+    text,
+)
+from generator.page_pipeline import Page, scrape_pages
 from generator.prettyprint import Platform, Status
+from generator.scrape_journal import ScrapeJournal
+from generator.transport import PooledSession
+
+LIST_ELEMENT_MARKER = re.compile(rb'class="[^"]*\banime-list-element\b')
+"""Markup of an entry on a listing page; a page without one is past the end"""
+PROBE_ATTEMPTS = 3
+"""Times a page is probed before the last page search gives up on it"""
+
+
+def kaize_extract_list(
+    html: str, backend: Optional[str] = None
+) -> list[dict[str, Any]]:
+    """
+    Extract the anime entries of a listing page.
+
+    :param html: The listing page
+    :param backend: HTML parser backend, `HTML_PARSER` by default
+    """
+    if get_backend(backend) == "lxml":
+        return _extract_list_lxml(html)
+    return _extract_list_bs4(html)
+
+
+def _extract_list_bs4(html: str) -> list[dict[str, Any]]:
+    """Extract the anime entries with BeautifulSoup."""
+    soup = close_open_cells(BeautifulSoup(html, "html.parser"))
+    kz_dat = soup.find_all("div", {"class": "anime-list-element"})
+    result: list[dict[str, Any]] = []
+    for kz in kz_dat:
+        title_tag = kz.find("a", {"class": "name"})
+        cover_div = kz.find("div", {"class": "cover"})
+        if not (
+            title_tag and title_tag.get("href") and cover_div and cover_div.get("style")
+        ):
+            continue
+        title: str = title_tag.text
+        slug: str = title_tag["href"].split("/")[-1]
+        media_id_match = re.search(r"/anime_image_(\d+)", cover_div["style"])
+        media_id = int(media_id_match.group(1)) if media_id_match else 0
+        result.append({"title": title, "slug": slug, "kaize": media_id})
+    return result
+
+
+def _extract_list_lxml(html: str) -> list[dict[str, Any]]:
+    """Extract the anime entries with lxml, same entries as the bs4 version."""
+    document = parse_document(html)
+    if document is None:
+        return []
+    result: list[dict[str, Any]] = []
+    for kz in document.xpath(f"//div[{has_class('anime-list-element')}]"):
+        title_tag = first(kz, f".//a[{has_class('name')}]")
+        cover_div = first(kz, f".//div[{has_class('cover')}]")
+        if not (
+            title_tag is not None
+            and title_tag.get("href")
+            and cover_div is not None
+            and cover_div.get("style")
+        ):
+            continue
+        title: str = text(title_tag)
+        slug: str = title_tag.get("href").split("/")[-1]
+        media_id_match = re.search(r"/anime_image_(\d+)", cover_div.get("style"))
+        media_id = int(media_id_match.group(1)) if media_id_match else 0
+        result.append({"title": title, "slug": slug, "kaize": media_id})
+    return result
 
 
 class Kaize:
     """Kaize anime data scraper (Optimized and Session-Based)"""
 
-    def __init__(self, email: str, password: str) -> None:
+    def __init__(
+        self, email: str, password: str, session_path: Optional[str] = None
+    ) -> None:
+        """
+        Log in to Kaize, or reuse the login saved by an earlier run.
+
+        :param email: Login email
+        :param password: Login password
+        :param session_path: File the login cookies are saved to and
+            restored from, in plain text; keep it out of anything that gets
+            uploaded or committed. None logs in every time
+        """
         if not email or not password:
             raise ValueError("Email and password cannot be empty.")
 
         self.base_url = "https://kaize.io"
-        self.session = requests.Session()
+        self.last_page = 0
+        self.email = email
+        self.session_path = session_path
+        self.verified = False
+        # Own session for the login cookies, on the shared transport settings
+        self.session = PooledSession(retries=5, backoff_factor=1)
         self.session.headers.update(
             {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
             }
         )
 
-        retries = Retry(
-            total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]
-        )
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
-
-        # Perform login
-        self._login(email, password)
+        # Reuse the saved login if it still works, log in otherwise
+        if not self._restore_session():
+            self._login(email, password)
+            self.save_session()
 
         pprint.print(
             Platform.KAIZE, Status.READY, "Kaize anime data scraper ready to use."
@@ -90,25 +177,98 @@ class Kaize:
                 pprint.print(Platform.KAIZE, Status.PASS, "Successfully logged in to Kaize")
                 
                 # Extract XSRF token from cookies for future requests
-                xsrf_token = self.session.cookies.get("XSRF-TOKEN")
-                if xsrf_token:
-                    self.session.headers.update({
-                        "X-XSRF-TOKEN": xsrf_token,
-                    })
+                self._use_xsrf_token()
             else:
                 raise ConnectionError(f"Login failed with status code: {response.status_code}")
                 
         except requests.RequestException as e:
             raise ConnectionError(f"Login request failed: {e}")
 
-    def _verify_session(self) -> bool:
+    def _use_xsrf_token(self) -> None:
+        """
+        Send the XSRF token from the cookies with every request.
+        """
+        xsrf_token = self.session.cookies.get("XSRF-TOKEN")
+        if xsrf_token:
+            self.session.headers.update({"X-XSRF-TOKEN": xsrf_token})
+
+    def _restore_session(self) -> bool:
+        """
+        Load the cookies saved by an earlier run and check that they still work.
+
+        :return: Whether the saved login is valid; checking it costs one request
+        """
+        if not self.session_path or not os.path.exists(self.session_path):
+            return False
+        try:
+            with open(self.session_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("email") != self.email:
+                # Saved for other credentials
+                return False
+            for cookie in saved["cookies"]:
+                self.session.cookies.set(**cookie)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            pprint.print(
+                Platform.KAIZE, Status.WARN, f"Ignoring unreadable saved session: {e}"
+            )
+            self.session.cookies.clear()
+            return False
+
+        pprint.print(Platform.KAIZE, Status.INFO, "Reusing saved Kaize session...")
+        self._use_xsrf_token()
+        if self._verify_session(report_invalid=False):
+            return True
+
+        pprint.print(
+            Platform.KAIZE, Status.INFO, "Saved session has expired, logging in again"
+        )
+        self.session.cookies.clear()
+        self.session.headers.pop("X-XSRF-TOKEN", None)
+        return False
+
+    def save_session(self) -> None:
+        """
+        Save the login cookies to `session_path` for the next run.
+
+        The file holds a live login, so it is only readable by its owner.
+        """
+        if not self.session_path:
+            return
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+            }
+            for cookie in self.session.cookies
+        ]
+        os.makedirs(os.path.dirname(self.session_path) or ".", exist_ok=True)
+        # The temporary file is created with mode 0600, and the rename keeps it
+        with atomic_write(self.session_path) as writer:
+            writer.write(
+                json.dumps({"email": self.email, "cookies": cookies}).encode("utf-8")
+            )
+
+    def _verify_session(self, report_invalid: bool = True) -> bool:
+        """
+        Check that the session is logged in, and mark it as `verified`.
+
+        :param report_invalid: Print an error if it is not
+        """
         pprint.print(Platform.KAIZE, Status.INFO, "Verifying session...")
         verify_url = f"{self.base_url}/account/settings"
         try:
             response = self.session.get(verify_url, timeout=15, allow_redirects=False)
             if response.status_code == 200:
                 pprint.print(Platform.KAIZE, Status.PASS, "Session is valid.")
+                self.verified = True
                 return True
+            if not report_invalid:
+                return False
             pprint.print(
                 Platform.KAIZE,
                 Status.ERR,
@@ -121,133 +281,201 @@ class Kaize:
 
     def _page_exists(
         self, page: int, media: Literal["anime", "manga"] = "anime"
-    ) -> bool:
+    ) -> Optional[bool]:
         """
         Helper function to check if a given page number contains content.
+
+        The body is streamed and the request stops as soon as the first
+        anime element shows up, so a page is never downloaded and parsed in
+        full just to learn that it exists.
+
+        :return: True or False, or None if the page could not be checked
+            (network error, or a status other than 200 and 404)
         """
         url = f"{self.base_url}/{media}/top?page={page}"
         try:
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
+            with self.session.get(url, timeout=15, stream=True) as response:
+                if response.status_code == 404:
+                    return False
+                if response.status_code != 200:
+                    return None
+                # A page is considered to "exist" if it has at least one anime element.
+                tail = b""
+                for chunk in response.iter_content(chunk_size=16384):
+                    window = tail + chunk
+                    if LIST_ELEMENT_MARKER.search(window):
+                        return True
+                    # Keep enough to match a marker split across chunks
+                    tail = window[-256:]
                 return False
-            soup = BeautifulSoup(response.text, "html.parser")
-            # A page is considered to "exist" if it has at least one anime element.
-            return soup.find("div", {"class": "anime-list-element"}) is not None
         except requests.RequestException:
-            return False
+            return None
 
-    def _find_last_page(self, media: Literal["anime", "manga"] = "anime") -> int:
+    def _find_last_page(
+        self, media: Literal["anime", "manga"] = "anime", hint: Optional[int] = None
+    ) -> int:
         """
-        Finds the last page number using an efficient binary search probing method.
+        Finds the last page number by probing several pages per round trip.
         This is the correct optimization for a site with only a "Next" button.
-        """
-        pprint.print(
-            Platform.KAIZE, Status.INFO, "Finding last page using binary search..."
-        )
-
-        # Step 1: Find an upper bound exponentially.
-        low = 1
-        high = 1
-        while self._page_exists(high, media):
-            low = high
-            high *= 2
-            pprint.print(
-                Platform.KAIZE,
-                Status.INFO,
-                f"Last page is at least {low}, checking {high}...",
-                clean_line=True,
-                end="",
-            )
 
+        :param media: The listing to search
+        :param hint: Last page count of the previous run. The search starts
+            by probing it and the page after it, which settles an unchanged
+            count in a single round trip.
+        :return: The last page number, 0 if there are no pages
+        :raises ConnectionError: A page could not be checked; guessing would
+            cut the scrape short
+        """
+        probes = max(KAIZE_PAGE_PROBES, 2)
         pprint.print(
             Platform.KAIZE,
             Status.INFO,
-            f"Found upper bound. Last page is between {low} and {high}.",
+            f"Finding last page with {probes} concurrent probes"
+            + (f", starting from page {hint}" if hint else "")
+            + "...",
         )
 
-        # Step 2: Perform binary search between low and high.
-        last_known_good = low
-        while low <= high:
-            mid = (low + high) // 2
-            if mid == 0:
-                break  # Safety break
-            pprint.print(
-                Platform.KAIZE,
-                Status.INFO,
-                f"Searching... Low: {low}, Mid: {mid}, High: {high}",
-                clean_line=True,
-                end="",
-            )
-            if self._page_exists(mid, media):
-                last_known_good = mid
-                low = mid + 1
-            else:
-                high = mid - 1
+        # Pages up to `low` exist and the pages from `high` on do not;
+        # `high` is None until a missing page has been seen.
+        seen: dict[int, bool] = {}
+        low, high = 0, None
+        candidates = [hint, hint + 1] if hint and hint > 0 else [1]
+        step = 1
+
+        with ThreadPoolExecutor(max_workers=probes) as executor:
+            while True:
+                for attempt in range(1, PROBE_ATTEMPTS + 1):
+                    results = dict(
+                        zip(
+                            candidates,
+                            executor.map(
+                                lambda page: self._page_exists(page, media),
+                                candidates,
+                            ),
+                        )
+                    )
+                    seen.update(
+                        (page, ok) for page, ok in results.items() if ok is not None
+                    )
+                    candidates = [page for page, ok in results.items() if ok is None]
+                    if not candidates:
+                        break
+                    if attempt == PROBE_ATTEMPTS:
+                        raise ConnectionError(
+                            f"Could not check Kaize page(s) {', '.join(map(str, candidates))}"
+                        )
+                    pprint.print(
+                        Platform.KAIZE,
+                        Status.WARN,
+                        f"Probing page(s) {', '.join(map(str, candidates))} failed, "
+                        f"retrying ({attempt}/{PROBE_ATTEMPTS - 1})",
+                    )
+                low = max((p for p, ok in seen.items() if ok), default=0)
+                high = min(
+                    (p for p, ok in seen.items() if not ok and p > low), default=None
+                )
+                if high == low + 1:
+                    break
+
+                if high is None:
+                    # Step 1: Find an upper bound, widening the stride each round.
+                    candidates = [low + step * i for i in range(1, probes + 1)]
+                    step *= probes + 1
+                else:
+                    # Step 2: Split the remaining range evenly between the probes.
+                    span = high - low
+                    candidates = sorted(
+                        {low + span * i // (probes + 1) for i in range(1, probes + 1)}
+                        - {low, high}
+                    )
+                pprint.print(
+                    Platform.KAIZE,
+                    Status.INFO,
+                    f"Last page is at least {low}"
+                    + (f" and below {high}" if high else "")
+                    + f", checking {', '.join(map(str, candidates))}...",
+                    clean_line=True,
+                    end="",
+                )
 
         pprint.print(
             Platform.KAIZE,
             Status.PASS,
-            f"Binary search complete. Last page is {last_known_good}.",
+            f"Search complete after {len(seen)} probes. Last page is {low}.",
         )
-        return last_known_good
+        return low
 
-    def _scrape_page(
+    def _fetch_page(
         self, page: int, media: Literal["anime", "manga"] = "anime"
-    ) -> list[dict[str, Any]]:
-        # This method is correct and remains unchanged
-        time.sleep(random.uniform(0.3, 1.0))
+    ) -> Optional[Page]:
+        """
+        Download a listing page, or return None if it failed to download.
+        Parsing is left to the parser processes of `scrape_pages`.
+        """
+        # Pacing comes from the kaize.io entry of RATE_LIMITS
         url = f"{self.base_url}/{media}/top?page={page}"
         try:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
         except requests.RequestException:
-            return []
-        soup = BeautifulSoup(response.text, "html.parser")
-        kz_dat = soup.find_all("div", {"class": "anime-list-element"})
-        result: list[dict[str, Any]] = []
-        for kz in kz_dat:
-            title_tag = kz.find("a", {"class": "name"})
-            cover_div = kz.find("div", {"class": "cover"})
-            if not (
-                title_tag
-                and title_tag.get("href")
-                and cover_div
-                and cover_div.get("style")
-            ):
-                continue
-            title: str = title_tag.text
-            slug: str = title_tag["href"].split("/")[-1]
-            media_id_match = re.search(r"/anime_image_(\d+)", cover_div["style"])
-            media_id = int(media_id_match.group(1)) if media_id_match else 0
-            result.append({"title": title, "slug": slug, "kaize": media_id})
-        return result
+            return None
+        return response.content, response.encoding
+
+    def get_anime(
+        self,
+        last_page_hint: Optional[int] = None,
+        journal: Optional[ScrapeJournal] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get every anime from the top listing.
 
-    def get_anime(self) -> list[dict[str, Any]]:
-        if not self._verify_session():
+        :param last_page_hint: Last page count of the previous run, used to
+            speed up the last page search. The count found is kept in
+            `last_page`.
+        :param journal: Checkpoint journal; pages already in it are skipped,
+            every downloaded page is added to it and the result is assembled
+            from it
+        """
+        # A restored session was checked when it was loaded
+        if not self.verified and not self._verify_session():
             raise ConnectionError("Unable to proceed with an invalid session.")
 
         pprint.print(Platform.KAIZE, Status.INFO, "Starting anime data collection")
-        total_pages = self._find_last_page()
+        total_pages = self._find_last_page(hint=last_page_hint)
+        self.last_page = total_pages
         if total_pages == 0:
             return []
 
         anime_data: list[dict[str, Any]] = []
         MAX_WORKERS = 8
 
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {
-                executor.submit(self._scrape_page, page): page
-                for page in range(1, total_pages + 1)
-            }
+        pages = range(1, total_pages + 1)
+        if journal is not None:
+            pages = [page for page in pages if page not in journal]
+
+        with alive_bar(total_pages, title="Getting Kaize data", spinner=None) as bar:
+            bar(total_pages - len(pages))
+            # Threads only download; pages are parsed in worker processes
+            for page, page_data in scrape_pages(
+                pages, self._fetch_page, kaize_extract_list, Platform.KAIZE, MAX_WORKERS
+            ):
+                # An empty page is a challenge or error page unless it is
+                # the last one; keep it out so a resumed run retries it
+                last = page == total_pages and page_data is not None
+                if journal is not None and (page_data or last):
+                    journal.record(page, page_data)
+                if page_data:
+                    anime_data.extend(page_data)
+                bar()
 
-            with alive_bar(
-                total_pages, title="Getting Kaize data", spinner=None
-            ) as bar:
-                for future in as_completed(futures):
-                    page_data = future.result()
-                    if page_data:
-                        anime_data.extend(page_data)
-                    bar()
+        if journal is not None:
+            done = {int(page): page_data for page, page_data in journal.items()}
+            anime_data = [
+                item
+                for page in sorted(done)
+                if page <= total_pages
+                for item in done[page]
+            ]
 
         anime_data.sort(key=lambda x: x["title"])
 
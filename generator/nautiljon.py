@@ -6,26 +6,47 @@
 # are preserved in the `NOTICE` file in the root of this repository.
 
 import math
-import random
 import re
-import time
+from queue import Queue
 from typing import Optional
 
 import cloudscraper
 from alive_progress import alive_bar
 from bs4 import BeautifulSoup, Tag
-from generator.const import pprint
+from generator.const import pprint, NAUTILJON_SESSIONS
+from generator.html_parser import (
+    close_open_cells,
+    first,
+    get_backend,
+    has_class,
+    parse_document,
+    stripped_text,
+)
+from generator.page_pipeline import Page, scrape_pages
 from generator.prettyprint import Platform, Status
-from requests.adapters import Retry
+from generator.scrape_journal import ScrapeJournal
+from generator.transport import instrument
 from requests import Response
 
 
-def nautiljon_extract_table(html_content: str) -> list[dict[str, str | int | None]]:
+def nautiljon_extract_table(
+    html_content: str, backend: Optional[str] = None
+) -> list[dict[str, str | int | None]]:
     """
     Extract the table data from the html content.
     This version is more robust against missing elements and malformed rows.
+
+    :param html_content: The listing page
+    :param backend: HTML parser backend, `HTML_PARSER` by default
     """
-    soup = BeautifulSoup(html_content, "html.parser")
+    if get_backend(backend) == "lxml":
+        return _extract_table_lxml(html_content)
+    return _extract_table_bs4(html_content)
+
+
+def _extract_table_bs4(html_content: str) -> list[dict[str, str | int | None]]:
+    """Extract the table data with BeautifulSoup."""
+    soup = close_open_cells(BeautifulSoup(html_content, "html.parser"))
     table = soup.find("table", class_="search")
     if not isinstance(table, Tag):
         return []
@@ -77,27 +98,91 @@ def nautiljon_extract_table(html_content: str) -> list[dict[str, str | int | Non
     return data_list
 
 
+def _extract_table_lxml(html_content: str) -> list[dict[str, str | int | None]]:
+    """Extract the table data with lxml, giving the same rows as the bs4 version."""
+    document = parse_document(html_content)
+    if document is None:
+        return []
+
+    table = first(document, f"//table[{has_class('search')}]")
+    if table is None:
+        return []
+
+    tbody = first(table, ".//tbody")
+    if tbody is None:
+        return []
+
+    data_list: list[dict[str, str | int | None]] = []
+
+    for row in tbody.xpath(".//tr"):
+        columns = row.xpath(".//td")
+        if len(columns) < 4:
+            continue
+
+        title_tag = first(columns[1], f".//a[{has_class('eTitre')}]")
+        title = stripped_text(title_tag) if title_tag is not None else "N/A"
+
+        francais_tag = first(columns[1], f".//span[{has_class('infos_small')}]")
+        francais = (
+            stripped_text(francais_tag).strip("()")
+            if francais_tag is not None
+            else title
+        )
+
+        slug_tag = first(columns[0], ".//a")
+        slug_href = slug_tag.get("href") if slug_tag is not None else ""
+        slug = re.sub(r"\.html$", "", slug_href.split("/")[-1])
+
+        img_tag = first(columns[0], ".//img")
+        img_src = img_tag.get("src") if img_tag is not None else ""
+        entry_id_match = re.search(r"_(\d+)\.webp", img_src)
+        entry_id = int(entry_id_match.group(1)) if entry_id_match else None
+
+        data_list.append(
+            {
+                "title": title,
+                "francais": francais,
+                "slug": slug,
+                "entry_id": entry_id,
+                "format": stripped_text(columns[2]),
+                "status": stripped_text(columns[3]),
+            }
+        )
+
+    return data_list
+
+
 class Nautiljon:
-    """Nautiljon class (Robust Sequential Scraper)"""
+    """Nautiljon class (Robust Scraper with a bounded session pool)"""
 
-    def __init__(self, scraper_: Optional[cloudscraper.CloudScraper] = None) -> None:
+    def __init__(
+        self,
+        scraper_: Optional[cloudscraper.CloudScraper] = None,
+        sessions: int = NAUTILJON_SESSIONS,
+    ) -> None:
         """
-        Initialize the Nautiljon class with a resilient session.
+        Initialize the Nautiljon class with a pool of resilient sessions.
+
+        :param scraper_: Session to use as the first one of the pool
+        :param sessions: Number of independently initialised sessions; pages
+            are fetched by this many sessions at once, 1 is sequential
         """
         if scraper_ is None:
             self.scraper = cloudscraper.create_scraper()
         else:
             self.scraper = scraper_
 
+        # Each session solves its own challenge and keeps its own cookies, so
+        # the site sees a few ordinary visitors instead of one fast one.
+        self.scrapers = [self.scraper] + [
+            cloudscraper.create_scraper() for _ in range(max(sessions, 1) - 1)
+        ]
+
         # Add a retry strategy for resilience against temporary server errors.
-        # This does not add concurrency, it just makes single requests more reliable.
-        retries = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = self.scraper.adapters["https://"]
-        adapter.max_retries = retries
+        # cloudscraper keeps its own TLS adapter, so only retries and metrics
+        # come from the shared transport.
+        for scraper in self.scrapers:
+            instrument(scraper, retries=3, backoff_factor=1)
 
         self.base_url = "https://www.nautiljon.com"
         self.search_url = f"{self.base_url}/animes/"
@@ -107,14 +192,19 @@ class Nautiljon:
             "Nautiljon anime data scraper ready to use",
         )
 
-    def _get(self, url: str) -> Optional[Response]:
+    def _get(
+        self, url: str, scraper: Optional[cloudscraper.CloudScraper] = None
+    ) -> Optional[Response]:
         """
         Get the content of the url using the resilient session.
         Includes a timeout to prevent indefinite hangs.
+
+        :param url: The url to get
+        :param scraper: Session of the pool to use, the first one by default
         """
         try:
             # Using a timeout is critical for robustness
-            resp = self.scraper.get(url, timeout=30)
+            resp = (scraper or self.scraper).get(url, timeout=30)
             resp.raise_for_status()
             return resp
         except Exception as err:
@@ -124,13 +214,44 @@ class Nautiljon:
             )
             return None
 
-    def get_animes(self) -> list[dict[str, str | int | None]]:
+    def _fetch_offset(
+        self, offset: int, pool: "Queue[cloudscraper.CloudScraper]"
+    ) -> Optional[Page]:
+        """
+        Download the listing page starting at `offset` with a session from `pool`.
+
+        Each session sends at most one request at a time; the overall request
+        rate is set by the www.nautiljon.com entry of `RATE_LIMITS`. Parsing
+        is left to the parser processes of `scrape_pages`.
+
+        :return: The raw page, or None if it failed to download
+        """
+        scraper = pool.get()
+        try:
+            page = self._get(f"{self.search_url}?dbt={offset}", scraper)
+        finally:
+            pool.put(scraper)
+
+        # If the page failed to download, skip it and continue
+        if not page:
+            return None
+        return page.content, page.encoding
+
+    def get_animes(
+        self, journal: Optional[ScrapeJournal] = None
+    ) -> list[dict[str, str | int | None]]:
         """
-        Get anime data from Nautiljon using the original, reliable sequential method.
+        Get anime data from Nautiljon, one page per session of the pool at a time.
+
+        :param journal: Checkpoint journal; pages already in it are skipped,
+            every downloaded page is added to it and the result is assembled
+            from it
         """
         anime_data: list[dict[str, str | int | None]] = []
         pprint.print(
-            Platform.NAUTILJON, Status.INFO, "Starting sequential anime data collection"
+            Platform.NAUTILJON,
+            Status.INFO,
+            f"Starting anime data collection with {len(self.scrapers)} session(s)",
         )
 
         # Get the first page to determine the total number of pages
@@ -144,40 +265,60 @@ class Nautiljon:
 
         # Safer way to find the last page number
         last_page_tag = soup.select_one("p.menupage a:last-of-type")
-        if not last_page_tag or not last_page_tag.get("href"):
+        last_page_href = last_page_tag.get("href") if last_page_tag else None
+        if not last_page_href or not isinstance(last_page_href, str):
             raise ValueError("Could not find the last page link on Nautiljon.")
 
-        last_page_offset_str = last_page_tag["href"].split("=")[-1]
+        last_page_offset_str = last_page_href.split("=")[-1]
         last_page = round(int(last_page_offset_str) / 15)
         pprint.print(Platform.NAUTILJON, Status.NOTICE, f"Last page: {last_page}")
 
-        # The core scraping loop remains sequential, as requested
+        pool: Queue[cloudscraper.CloudScraper] = Queue()
+        for scraper in self.scrapers:
+            pool.put(scraper)
+
         with alive_bar(last_page, title="Getting Nautiljon data", spinner=None) as bar:
-            scraped = nautiljon_extract_table(first_page.text)
-            anime_data.extend(scraped)
-            bar()
-
-            for page_number in range(15, last_page * 15, 15):
-                # The original, working sleep call is preserved
-                time.sleep(random.uniform(0.1, 1.5))
-
-                page = self._get(f"{self.search_url}?dbt={page_number}")
-                # If the page failed to download, skip it and continue
-                if not page:
-                    bar()
-                    continue
-
-                scrape = nautiljon_extract_table(page.text)
-                if len(scrape) < 15 and page_number < last_page * 15:
-                    pg = (page_number // 15) + 1
-                    pprint.print(
-                        Platform.NAUTILJON,
-                        Status.WARN,
-                        f"Page {pg} has less than 15 animes, only {len(scrape)} animes scraped",
-                    )
-                anime_data.extend(scrape)
+            pages: dict[int, list[dict[str, str | int | None]]] = {
+                0: nautiljon_extract_table(first_page.text)
+            }
+            offsets = range(15, last_page * 15, 15)
+            last_offset = (last_page - 1) * 15
+            if journal is not None:
+                if pages[0] or last_offset <= 0:
+                    journal.record(0, pages[0])
+                offsets = [offset for offset in offsets if offset not in journal]
+            bar(last_page - len(offsets))
+
+            # Sessions only download; pages are parsed in worker processes
+            for offset, scrape in scrape_pages(
+                offsets,
+                lambda offset: self._fetch_offset(offset, pool),
+                nautiljon_extract_table,
+                Platform.NAUTILJON,
+                len(self.scrapers),
+            ):
+                if scrape is not None:
+                    # An empty page is a challenge or login page unless it
+                    # is the last one; keep it out so a resumed run retries it
+                    if journal is not None and (scrape or offset == last_offset):
+                        journal.record(offset, scrape)
+                    if len(scrape) < 15 and offset < last_page * 15:
+                        pprint.print(
+                            Platform.NAUTILJON,
+                            Status.WARN,
+                            f"Page {offset // 15 + 1} has less than 15 animes, "
+                            f"only {len(scrape)} animes scraped",
+                        )
+                pages[offset] = scrape or []
                 bar()
 
+        if journal is not None:
+            pages = {int(offset): rows for offset, rows in journal.items()}
+
+        # Put the pages back in site order before the final sort
+        for offset in sorted(pages):
+            anime_data.extend(pages[offset])
+
         anime_data.sort(key=lambda x: x["title"])
 
         pprint.print(
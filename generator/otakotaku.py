@@ -5,17 +5,31 @@
 # code from the 'animeApi' project by 'nattadasu'. The original license notices
 # are preserved in the `NOTICE` file in the root of this repository.
 
+import asyncio
 import random
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, Union
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
 from alive_progress import alive_bar
 from bs4 import BeautifulSoup, Tag
-from generator.const import pprint
+from generator.aimd import AIMDLimiter
+from generator.const import (
+    pprint,
+    OTAKOTAKU_CONCURRENCY,
+    OTAKOTAKU_MAX_CONCURRENCY,
+    OTAKOTAKU_RECHECK_SAMPLE,
+    OTAKOTAKU_RECHECK_WINDOW,
+    OTAKOTAKU_TOMBSTONE_AFTER,
+)
 from generator.prettyprint import Platform, Status
+from generator.rate_limit import rate_limit_wait
+from generator.scrape_journal import ScrapeJournal
+from generator.transport import PooledSession
+
+ANSWER_STATUSES = (200, 404)
+"""Statuses that answer whether an ID exists; any other is a failed request"""
 
 
 class OtakOtaku:
@@ -23,18 +37,11 @@ class OtakOtaku:
 
     def __init__(self) -> None:
         """Initiate the class with a persistent and resilient session."""
-        self.session = requests.Session()
-
         # Strategy: Implement automatic retries with exponential backoff.
-        # This tells requests to retry on common server errors (5xx) or rate-limit codes (429).
+        # The shared transport retries on common server errors (5xx) or rate-limit codes (429).
         # It will wait {backoff factor} * (2 ** ({number of retries} - 1)) seconds.
         # e.g., for backoff_factor=0.5: 0.5s, 1s, 2s, 4s, 8s
-        retries = Retry(
-            total=5,
-            backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        self.session = PooledSession(retries=5, backoff_factor=0.5)
 
         # Strategy: Simplify headers and use a standard User-Agent.
         self.session.headers.update(
@@ -108,18 +115,38 @@ class OtakOtaku:
         pprint.print(Platform.OTAKOTAKU, Status.PASS, f"Latest anime id: {anime_id}")
         return anime_id
 
-    def _get_data(self, anime_id: int) -> Optional[dict[str, Any]]:
+    def _request(self, url: str) -> tuple[Optional[requests.Response], bool]:
         """
-        Get anime data for a single ID with a polite delay.
-        This function is the target for our concurrent calls.
-        """
-        # Strategy: Add a small, random delay to each worker task to appear more "human".
-        time.sleep(random.uniform(0.1, 0.4))
+        Get the response from the url without raising on HTTP errors.
 
-        # The trailing part of the URL is ignored by the API, so we can simplify it.
-        url = f"https://otakotaku.com/api/anime/view/{anime_id}"
-        response = self._get(url)
-        if not response:
+        :param url: The url to get the response
+        :return: The response (None on a failed request) and whether the
+            site signalled overload (429/5xx, including retried ones)
+        """
+        try:
+            response = self.session.get(url, timeout=15)
+        except requests.RequestException as err:
+            pprint.print(
+                Platform.OTAKOTAKU,
+                Status.ERR,
+                f"Request failed for {url} after retries: {err}",
+            )
+            return None, True
+
+        statuses = [response.status_code]
+        retries = response.raw.retries if response.raw is not None else None
+        if retries is not None:
+            statuses += [
+                attempt.status for attempt in retries.history if attempt.status
+            ]
+        overloaded = any(status == 429 or status >= 500 for status in statuses)
+        return response, overloaded
+
+    def _parse_data(self, response: requests.Response) -> Optional[dict[str, Any]]:
+        """
+        Parse the anime data from an `/api/anime/view/{id}` response.
+        """
+        if not response.ok:
             return None
 
         try:
@@ -151,45 +178,200 @@ class OtakOtaku:
         }
         return result
 
-    def get_anime(self) -> list[dict[str, Any]]:
+    async def _sweep(
+        self,
+        anime_ids: Iterable[int],
+        bar: Any,
+        journal: Optional[ScrapeJournal] = None,
+    ) -> tuple[dict[int, dict[str, Any]], set[int]]:
+        """
+        Fetch anime IDs with adaptive concurrency.
+
+        A fixed set of worker coroutines pulls IDs from a shared iterator, and
+        the AIMD limiter decides how many of them may have a request in
+        flight. The blocking requests run on a thread pool sized to the
+        limiter's maximum.
+
+        :param anime_ids: The IDs to fetch
+        :param bar: Progress callback, called once per ID
+        :param journal: Checkpoint journal that every answered ID is added to
+        :return: The anime data keyed by ID, and the IDs the site answered
+            without data. Failed, throttled or blocked (e.g. 403) requests
+            are in neither, so their IDs keep their previous data.
+        """
+        limiter = AIMDLimiter(
+            initial=OTAKOTAKU_CONCURRENCY,
+            maximum=OTAKOTAKU_MAX_CONCURRENCY,
+        )
+        loop = asyncio.get_running_loop()
+        pending = iter(anime_ids)
+        found: dict[int, dict[str, Any]] = {}
+        missing: set[int] = set()
+        failed = 0
+
+        async def worker() -> None:
+            nonlocal failed
+            for anime_id in pending:
+                # The trailing part of the URL is ignored by the API, so we can simplify it.
+                url = f"https://otakotaku.com/api/anime/view/{anime_id}"
+                async with limiter:
+                    start = time.perf_counter()
+                    response, overloaded = await loop.run_in_executor(
+                        executor, self._request, url
+                    )
+                    # Waiting for a rate limit token is not congestion
+                    waited = rate_limit_wait(response)
+                    limiter.feedback(
+                        not overloaded, time.perf_counter() - start - waited
+                    )
+
+                # A final answer counts even if a 429/5xx was retried first
+                if response is not None and response.status_code in ANSWER_STATUSES:
+                    data = self._parse_data(response)
+                    if data:
+                        found[anime_id] = data
+                    else:
+                        missing.add(anime_id)
+                    if journal is not None:
+                        journal.record(anime_id, data)
+                else:
+                    failed += 1
+                bar()
+
+        with ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+            await asyncio.gather(*(worker() for _ in range(limiter.maximum)))
+
+        pprint.print(
+            Platform.OTAKOTAKU,
+            Status.INFO,
+            f"Settled at {int(limiter.limit)} concurrent requests",
+        )
+        if failed:
+            pprint.print(
+                Platform.OTAKOTAKU,
+                Status.WARN,
+                f"{failed} ID(s) got no usable answer and keep their previous data",
+            )
+        return found, missing
+
+    def _plan_ids(
+        self,
+        latest_id: int,
+        previous: dict[int, dict[str, Any]],
+        tombstones: dict[int, int],
+    ) -> list[int]:
+        """
+        Choose the IDs an incremental run fetches.
+
+        :param latest_id: The newest ID on the site
+        :param previous: The anime data of the last run, keyed by ID
+        :param tombstones: Consecutive empty answers per ID
+        :return: IDs above the previous maximum, the recent window below it,
+            and a random sample of older IDs, without tombstoned ones
+        """
+        dead = {
+            anime_id
+            for anime_id, misses in tombstones.items()
+            if misses >= OTAKOTAKU_TOMBSTONE_AFTER
+        }
+        previous_max = max(previous, default=0)
+        window_start = max(1, previous_max - OTAKOTAKU_RECHECK_WINDOW + 1)
+
+        # New IDs are always fetched, even ones that were tombstoned
+        # before the site reached them
+        anime_ids = set(range(previous_max + 1, latest_id + 1))
+        anime_ids.update(
+            anime_id
+            for anime_id in range(window_start, previous_max + 1)
+            if anime_id not in dead
+        )
+        older = [
+            anime_id for anime_id in range(1, window_start) if anime_id not in dead
+        ]
+        anime_ids.update(
+            random.sample(older, min(OTAKOTAKU_RECHECK_SAMPLE, len(older)))
+        )
+        return sorted(anime_ids)
+
+    def get_anime(
+        self,
+        previous: Optional[list[dict[str, Any]]] = None,
+        tombstones: Optional[dict[int, int]] = None,
+        journal: Optional[ScrapeJournal] = None,
+    ) -> list[dict[str, Any]]:
         """
         Get complete anime data concurrently and safely.
+
+        Without `previous` every ID is fetched. With it, only IDs above the
+        previous maximum, a rolling window of recent IDs and a random sample
+        of older ones are fetched and merged into the previous data.
+
+        :param previous: The anime data of the last run, for an incremental run
+        :param tombstones: Consecutive empty answers per ID, updated in place.
+            IDs that reach `OTAKOTAKU_TOMBSTONE_AFTER` are dropped from the
+            result and skipped by incremental runs.
+        :param journal: Checkpoint journal; IDs already in it are not fetched
+            again and the results of this sweep are assembled from it
+        :return: The anime data, sorted by title
         """
+        if tombstones is None:
+            tombstones = {}
+        known: dict[int, dict[str, Any]] = {
+            anime["otakotaku"]: anime for anime in previous or [] if anime["otakotaku"]
+        }
+        incremental = bool(known)
+
         pprint.print(
             Platform.OTAKOTAKU,
             Status.INFO,
-            "Starting safer concurrent anime data collection",
+            "Starting adaptive concurrent anime data collection"
+            + (f" (incremental, {len(known)} known)" if incremental else ""),
         )
 
         latest_id = self.get_latest_anime()
         if not latest_id:
             raise ValueError("Could not determine the latest anime ID to scrape.")
 
-        anime_list: list[dict[str, Any]] = []
-
-        # Strategy: Use a conservative number of workers to avoid IP bans.
-        # Start here. You can try increasing to 20 or 25 if no errors occur.
-        MAX_WORKERS = 25
-
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            # Submit all jobs to the executor
-            futures = {
-                executor.submit(self._get_data, anime_id): anime_id
-                for anime_id in range(1, latest_id + 1)
-            }
+        anime_ids = (
+            self._plan_ids(latest_id, known, tombstones)
+            if incremental
+            else list(range(1, latest_id + 1))
+        )
 
-            # Use alive_bar to track progress as futures complete
-            with alive_bar(
-                latest_id, title="Getting OtakOtaku data", spinner=None
-            ) as bar:
-                for future in as_completed(futures):
-                    data_index = future.result()
-                    if data_index:
-                        anime_list.append(data_index)
-                    bar()  # Manually advance the progress bar for each completed task
+        # Strategy: Let the request rate follow what the site tolerates.
+        # Concurrency grows while responses are healthy and is halved on
+        # 429/5xx or rising latency, so no hand-picked worker count is needed.
+        planned = len(anime_ids)
+        if journal is not None:
+            anime_ids = [i for i in anime_ids if i not in journal]
+        with alive_bar(planned, title="Getting OtakOtaku data", spinner=None) as bar:
+            bar(planned - len(anime_ids))
+            found, missing = asyncio.run(self._sweep(anime_ids, bar, journal))
+
+        if journal is not None:
+            journal.flush()
+            found = {int(i): data for i, data in journal.items() if data}
+            missing = {int(i) for i, data in journal.items() if not data}
+
+        # A single empty answer may be a hiccup; only repeated ones retire an ID
+        for anime_id in found:
+            tombstones.pop(anime_id, None)
+        for anime_id in missing:
+            tombstones[anime_id] = tombstones.get(anime_id, 0) + 1
+            if tombstones[anime_id] >= OTAKOTAKU_TOMBSTONE_AFTER:
+                known.pop(anime_id, None)
+        known.update(found)
+
+        if incremental:
+            pprint.print(
+                Platform.OTAKOTAKU,
+                Status.INFO,
+                f"Fetched {len(anime_ids)} of {latest_id} IDs: {len(found)} with data, "
+                f"{len(missing)} empty, {len(tombstones)} tombstoned",
+            )
 
         # Sorting is done once at the end, which is efficient.
-        anime_list.sort(key=lambda x: x["title"])
+        anime_list = sorted(known.values(), key=lambda x: x["title"])
 
         pprint.print(
             Platform.OTAKOTAKU,
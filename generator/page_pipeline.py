@@ -0,0 +1,230 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Two-stage page scraping: download threads feeding parser processes.
+Download threads only fetch raw page bodies. A process pool decodes and
+parses them, so parsing neither holds the GIL while sockets wait nor is
+limited to one core. Scrapers running at the same time share one pool.
+Both stages report their throughput when done.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from generator.const import pprint, PARSE_PROCESSES
+from generator.prettyprint import Platform, Status
+
+K = TypeVar("K")
+
+Page = Tuple[bytes, Optional[str]]
+"""Raw body of a page and the encoding from its headers, if any"""
+Extract = Callable[[str], list[dict[str, Any]]]
+"""Module-level function turning a page into rows, picklable for the workers"""
+Parsed = Tuple[float, Tuple[str, ...], list]
+"""Seconds spent, field names and row tuples of a parsed page"""
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_users = 0
+
+
+@dataclass
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    pages: int = 0
+    failed: int = 0
+    bytes: int = 0
+    rows: int = 0
+    busy: float = 0.0
+    """Seconds spent working, summed over the workers"""
+    first: Optional[float] = None
+    last: Optional[float] = None
+
+    def add(self, started: float, busy: float) -> None:
+        """Account one page that started at `started` and took `busy` seconds."""
+        self.pages += 1
+        self.busy += busy
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = max(self.last or 0.0, time.perf_counter())
+
+    @property
+    def wall(self) -> float:
+        """Seconds from the first page started to the last one finished."""
+        if self.first is None or self.last is None:
+            return 0.0
+        return self.last - self.first
+
+
+@contextmanager
+def _parser_pool(processes: int) -> Generator[ProcessPoolExecutor, None, None]:
+    """Use the process pool shared by every running scrape.
+
+    The first user creates it with `processes` workers and the last one
+    shuts it down, so concurrent scrapers never start more parsers than
+    one pool's worth.
+    """
+    global _pool, _pool_users
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the parent is running threads
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        _pool_users += 1
+        pool = _pool
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_users -= 1
+            idle = _pool_users == 0
+            if idle:
+                _pool = None
+        if idle:
+            pool.shutdown()
+
+
+def parse_page(extract: Extract, page: Page) -> Parsed:
+    """Decode and parse one page, in a worker process.
+
+    Rows come back as tuples with the field names sent once, which keeps
+    what is pickled back to the main process small.
+
+    Returns:
+        Seconds spent, field names and row tuples
+    """
+    start = time.perf_counter()
+    content, encoding = page
+    rows = extract(content.decode(encoding or "utf-8", errors="replace"))
+    fields = tuple(rows[0]) if rows else ()
+    return (
+        time.perf_counter() - start,
+        fields,
+        [tuple(row[field] for field in fields) for row in rows],
+    )
+
+
+def scrape_pages(
+    keys: Iterable[K],
+    fetch: Callable[[K], Optional[Page]],
+    extract: Extract,
+    platform: Platform,
+    io_workers: int,
+    processes: int = PARSE_PROCESSES,
+) -> Iterator[Tuple[K, Optional[list[dict[str, Any]]]]]:
+    """Fetch and parse pages, yielding ``(key, rows)`` as each one is done.
+
+    Pages come out in completion order; rows is None for a page that
+    failed to download. Stage throughput is printed once every page is done.
+
+    Args:
+        keys: Page keys (page number, offset, ...) passed to `fetch`
+        fetch: Downloads a page; returns None if it failed
+        extract: Turns a decoded page into rows
+        platform: Platform to log as
+        io_workers: Download threads
+        processes: Parser processes, unless a concurrent scrape already
+            started the shared pool; 0 parses in the download threads
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    downloads, parsing = StageStats(), StageStats()
+    lock = threading.Lock()
+
+    with ExitStack() as stack:
+        parser = None
+        if processes > 0:
+            parser = stack.enter_context(_parser_pool(processes))
+        io = stack.enter_context(ThreadPoolExecutor(max_workers=io_workers))
+
+        def download(key: K) -> Optional[Future[Parsed]]:
+            start = time.perf_counter()
+            page = fetch(key)
+            with lock:
+                downloads.add(start, time.perf_counter() - start)
+                if page is None:
+                    downloads.failed += 1
+                    return None
+                downloads.bytes += len(page[0])
+            if parser is not None:
+                return parser.submit(parse_page, extract, page)
+            inline: Future[Parsed] = Future()
+            inline.set_result(parse_page(extract, page))
+            return inline
+
+        started: Dict[Future[Parsed], float] = {}
+        fetching = {io.submit(download, key): key for key in keys}
+        parses: Dict[Future[Parsed], K] = {}
+        pending: Set[Future[Any]] = set(fetching)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fetched in fetching.keys() & done:
+                key = fetching.pop(fetched)
+                parse_future = fetched.result()
+                if parse_future is None:
+                    yield key, None
+                    continue
+                parses[parse_future] = key
+                started[parse_future] = time.perf_counter()
+                pending.add(parse_future)
+
+            for future in parses.keys() & done:
+                key = parses.pop(future)
+                seconds, fields, rows = future.result()
+                parsing.add(started.pop(future), seconds)
+                parsing.rows += len(rows)
+                yield key, [dict(zip(fields, row)) for row in rows]
+
+    _report(platform, downloads, parsing, processes)
+
+
+def _report(
+    platform: Platform, downloads: StageStats, parsing: StageStats, processes: int
+) -> None:
+    """Print the throughput of both stages."""
+    if downloads.pages:
+        wall = max(downloads.wall, 1e-9)
+        pprint.print(
+            platform,
+            Status.INFO,
+            f"Download stage: {downloads.pages} pages ({downloads.failed} failed), "
+            f"{downloads.bytes / 1e6:.1f} MB in {downloads.wall:.1f}s, "
+            f"{downloads.pages / wall:.1f} pages/s, "
+            f"{downloads.bytes / 1e6 / wall:.2f} MB/s",
+        )
+    if parsing.pages:
+        where = f"{processes} process(es)" if processes > 0 else "download threads"
+        pprint.print(
+            platform,
+            Status.INFO,
+            f"Parse stage: {parsing.pages} pages, {parsing.rows} rows on {where} "
+            f"in {parsing.wall:.1f}s, "
+            f"{parsing.pages / max(parsing.wall, 1e-9):.1f} pages/s, "
+            f"{parsing.busy:.1f}s busy",
+        )
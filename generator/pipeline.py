@@ -9,6 +9,8 @@ Replaces the turso-based implementation with SQLAlchemy + libsql for better perf
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from typing import Dict, Any
 
 # Import dialect to ensure registration
@@ -16,10 +18,25 @@ from typing import Dict, Any
 from generator.data_operations import SQLAlchemyOperations
 from generator.schema import SQLAlchemySchema
 from generator.cache_downloader import CacheDownloader
+from generator.cache_io import list_cached
+from generator.download_cache import (
+    MANIFEST_FILENAME,
+    CacheManifest,
+    DownloadCacheRepository,
+)
 from generator.data_extractor import DataExtractor
 from generator.incremental_kv_ingest import IncrementalKVIngest
 from generator.status_updater import StatusUpdater
-from generator.const import pprint, CACHE_DIR, DATABASE_URL
+from generator.const import (
+    pprint,
+    process_database_url,
+    CACHE_DIR,
+    DATABASE_URL,
+    DOWNLOAD_CACHE_BACKEND,
+    DOWNLOAD_CACHE_MIRROR,
+    DOWNLOAD_CONCURRENT_SOURCES,
+    DOWNLOAD_VERIFY,
+)
 from generator.prettyprint import Platform, Status
 
 
@@ -30,148 +47,128 @@ class SQLAlchemyPipeline:
         """Initialize pipeline with database path and cache directory."""
         self.db_path = db_path
         self.cache_dir = cache_dir
-
-        # Initialize schema
-        self.schema = SQLAlchemySchema(db_path)
-        self.engine = self.schema.init_database()
-
-        # Initialize operations
-        self.operations = SQLAlchemyOperations(db_path)
+        self.engine = None
+        self._schema = None
+        self._operations = None
+        self._db_executor = None
+        self._db_init = None
+
+        if DOWNLOAD_CACHE_BACKEND == "manifest":
+            # Downloads only need the local manifest, so the database is
+            # set up in the background while they run
+            self.download_cache = CacheManifest(
+                os.path.join(cache_dir, MANIFEST_FILENAME)
+            )
+            self._db_executor = ThreadPoolExecutor(max_workers=1)
+            self._db_init = self._db_executor.submit(self._init_database)
+        else:
+            self._init_database()
+            self.download_cache = DownloadCacheRepository(self.operations.Session)
 
         # Initialize other components
-        # For now, create a wrapper that provides the necessary interface for CacheDownloader
-        from generator.models import DownloadCache
-        from sqlalchemy import select, delete as sql_delete
-
-        # Create a database wrapper that properly handles cache operations
-        class DatabaseWrapper:
-            def __init__(self, operations):
-                self.operations = operations
-                self._last_result = None
-
-            def cursor(self):
-                return self
-
-            def execute(self, query: str, params: tuple | None = None):
-                # Handle common database operations that CacheDownloader needs
-                if "DELETE FROM download_cache WHERE source_url = ?" in query:
-                    # Delete existing cache entry
-                    if params:
-                        with self.operations.Session() as session:
-                            session.execute(
-                                sql_delete(DownloadCache).where(
-                                    DownloadCache.source_url == params[0]
-                                )
-                            )
-                            session.commit()
-                elif "INSERT INTO download_cache" in query:
-                    # Insert new cache entry
-                    if params:
-                        with self.operations.Session() as session:
-                            # Check which columns are being inserted
-                            if "metadata)" in query:
-                                # params: (source_type, url, file_path, file_hash, metadata)
-                                cache_entry = DownloadCache(
-                                    source_type=params[0],
-                                    source_url=params[1],
-                                    file_path=params[2],
-                                    file_hash=params[3],
-                                    file_metadata=params[4]
-                                    if len(params) > 4
-                                    else None,
-                                )
-                            else:
-                                # params: (source_type, url, file_path, file_hash, expires_at)
-                                expires_at = None
-                                if len(params) > 4 and params[4]:
-                                    # Parse the ISO format datetime string
-                                    from datetime import datetime
-
-                                    expires_at = datetime.fromisoformat(params[4])
-
-                                cache_entry = DownloadCache(
-                                    source_type=params[0],
-                                    source_url=params[1],
-                                    file_path=params[2],
-                                    file_hash=params[3],
-                                    expires_at=expires_at,
-                                )
-                            session.add(cache_entry)
-                            session.commit()
-                elif "SELECT" in query:
-                    # Handle SELECT queries
-                    if params:
-                        with self.operations.Session() as session:
-                            if "file_hash, metadata FROM download_cache" in query:
-                                # Get file hash and metadata
-                                result = session.execute(
-                                    select(
-                                        DownloadCache.file_hash,
-                                        DownloadCache.file_metadata,
-                                    ).where(DownloadCache.source_url == params[0])
-                                ).first()
-                                if result:
-                                    # Return tuple format like turso
-                                    self._last_result = [(result[0], result[1])]
-                                else:
-                                    self._last_result = []
-                            elif "file_hash FROM download_cache" in query:
-                                # Get just file hash
-                                result = session.execute(
-                                    select(DownloadCache.file_hash).where(
-                                        DownloadCache.source_url == params[0]
-                                    )
-                                ).first()
-                                if result:
-                                    self._last_result = [(result[0],)]
-                                else:
-                                    self._last_result = []
-                            elif "expires_at FROM download_cache" in query:
-                                # Get expiry date
-                                result = session.execute(
-                                    select(DownloadCache.expires_at).where(
-                                        DownloadCache.source_url == params[0]
-                                    )
-                                ).first()
-                                if result and result[0]:
-                                    # Convert datetime to ISO string for compatibility
-                                    self._last_result = [(result[0].isoformat(),)]
-                                else:
-                                    self._last_result = []
-                            else:
-                                # Generic select all
-                                result = session.execute(select(DownloadCache)).all()
-                                self._last_result = result
-
-            def fetchall(self):
-                return self._last_result or []
-
-            def fetchone(self):
-                return self._last_result[0] if self._last_result else None
-
-            def commit(self):
-                pass
-
-        db_wrapper = DatabaseWrapper(self.operations)
-        self.downloader = CacheDownloader(db_wrapper, cache_dir)
+        self.downloader = CacheDownloader(self.download_cache, cache_dir)
         self.extractor = DataExtractor(cache_dir)
-        self.status_updater = StatusUpdater(self.operations)
         # For now, skip KV ingest as it needs to be updated for SQLAlchemy
         self.kv_ingest = None
 
+    def _init_database(self) -> None:
+        """Connect to the database and bring the schema up to date."""
+        process_database_url(self.db_path)
+
+        # Initialize schema
+        self._schema = SQLAlchemySchema(self.db_path)
+        self.engine = self._schema.init_database()
+
+        # Initialize operations
+        self._operations = SQLAlchemyOperations(self.db_path)
+
+    def _wait_for_database(self) -> None:
+        """Block until background database setup is done, re-raising its errors."""
+        if self._db_init is not None:
+            self._db_init.result()
+
+    @property
+    def schema(self) -> SQLAlchemySchema:
+        """Database schema manager."""
+        self._wait_for_database()
+        assert self._schema is not None
+        return self._schema
+
+    @property
+    def operations(self) -> SQLAlchemyOperations:
+        """Database operations."""
+        self._wait_for_database()
+        assert self._operations is not None
+        return self._operations
+
+    @cached_property
+    def status_updater(self) -> StatusUpdater:
+        """Status file updater, built on first use."""
+        return StatusUpdater(self.operations)
+
+    def _mirror_download_cache(self) -> None:
+        """Copy the local download cache manifest into the download_cache table."""
+        try:
+            repository = DownloadCacheRepository(self.operations.Session)
+            repository.replace_all(self.download_cache.all())
+            repository.flush()
+            pprint.print(
+                Platform.SYSTEM, Status.INFO, "Mirrored download cache to database"
+            )
+        except Exception as e:
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"Could not mirror download cache to database: {e}",
+            )
+
     def run_download_phase(self, ignore_cache: bool = False) -> Dict[str, Any]:
         """Run the download phase of the pipeline."""
         pprint.print(Platform.SYSTEM, Status.INFO, "Starting download phase...")
         start_time = time.time()
 
         try:
-            # Download from GitHub
-            github_results = self.downloader.download_github_files(
-                ignore_cache=ignore_cache
-            )
+            # Read all download cache rows up front and drop expired ones,
+            # so their sources are fetched again
+            self.download_cache.load()
+            self.downloader.clean_expired_cache()
+            if DOWNLOAD_VERIFY:
+                self.downloader.verify_cache()
+
+            try:
+                if DOWNLOAD_CONCURRENT_SOURCES:
+                    # GitHub and the scrapers hit different hosts, so the
+                    # phase takes as long as the slowest source, not the sum
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        github_future = executor.submit(
+                            self.downloader.download_github_files,
+                            ignore_cache=ignore_cache,
+                        )
+                        scraper_future = executor.submit(
+                            self.downloader.run_scrapers,
+                            ignore_cache=ignore_cache,
+                            concurrent=True,
+                        )
+                        # A failing source re-raises here only after the
+                        # executor let the other one finish
+                        github_results = github_future.result()
+                        scraper_results = scraper_future.result()
+                else:
+                    # Download from GitHub
+                    github_results = self.downloader.download_github_files(
+                        ignore_cache=ignore_cache
+                    )
+
+                    # Run scrapers
+                    scraper_results = self.downloader.run_scrapers(
+                        ignore_cache=ignore_cache
+                    )
+            finally:
+                # Write every cache update back at once
+                self.download_cache.flush()
 
-            # Run scrapers
-            scraper_results = self.downloader.run_scrapers(ignore_cache=ignore_cache)
+            if isinstance(self.download_cache, CacheManifest) and DOWNLOAD_CACHE_MIRROR:
+                self._mirror_download_cache()
 
             download_time = time.time() - start_time
 
@@ -202,11 +199,7 @@ class SQLAlchemyPipeline:
 
         try:
             # Get list of cache files
-            cache_files = {}
-            if os.path.exists(self.cache_dir):
-                for filename in os.listdir(self.cache_dir):
-                    if filename.endswith(".json"):
-                        cache_files[filename] = os.path.join(self.cache_dir, filename)
+            cache_files = list_cached(self.cache_dir)
 
             # Extract data from cache files
             records = self.extractor.extract_anime_data(cache_files)
@@ -368,7 +361,6 @@ class SQLAlchemyPipeline:
 
                 changes_processed = len(pending_changes)
 
-
             kv_time = time.time() - start_time
 
             result = {
@@ -446,11 +438,7 @@ class SQLAlchemyPipeline:
             pending_changes = self.operations.get_pending_changes()
 
             # Get cached files count
-            cached_files = 0
-            if os.path.exists(self.cache_dir):
-                cached_files = len(
-                    [f for f in os.listdir(self.cache_dir) if f.endswith(".json")]
-                )
+            cached_files = len(list_cached(self.cache_dir))
 
             return {
                 "total_records": total_records,
@@ -496,8 +484,19 @@ class SQLAlchemyPipeline:
 
     def close(self) -> None:
         """Close database connections."""
-        self.operations.close()
-        self.schema.close()
+        if self._db_executor is not None:
+            # Let background setup finish; its errors were already surfaced
+            # to whoever needed the database
+            try:
+                self._wait_for_database()
+            except Exception:
+                pass
+            self._db_executor.shutdown()
+
+        if self._operations is not None:
+            self._operations.close()
+        if self._schema is not None:
+            self._schema.close()
 
     def __enter__(self):
         """Context manager entry."""
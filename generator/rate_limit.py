@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Per-host token-bucket rate limiting.
+Every request to a limited host takes a token from that host's bucket,
+shared by all threads and sessions, so the request rate is set by
+configuration instead of by thread counts and sleeps. A ``Retry-After``
+from the host pauses its bucket for everyone.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from generator.const import RATE_LIMITS
+
+THROTTLE_STATUSES = (429, 503)
+"""Statuses that mean the host wants fewer requests"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens refill at `rate` per second up to `burst`; `acquire` waits until
+    one is available. Implemented as GCRA (a theoretical arrival time per
+    bucket), which needs no background refill.
+
+    Args:
+        rate: Sustained requests per second
+        burst: Requests allowed back to back after an idle period
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.interval = 1 / rate
+        self.tolerance = (self.burst - 1) * self.interval
+        self._tat = time.monotonic()
+        self._shift = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, waiting for it if needed. Returns the seconds waited."""
+        start = time.monotonic()
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(tat - self.tolerance - now, 0.0)
+            self._tat = tat + self.interval
+            shift = self._shift
+
+        while wait:
+            time.sleep(wait)
+            # A pause while we waited moved our slot back by its length
+            with self._lock:
+                wait, shift = self._shift - shift, self._shift
+        return time.monotonic() - start
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds`, then resume without a burst.
+
+        Slots already handed to waiting threads move back by `seconds`,
+        keeping their spacing, so none of them falls inside the pause.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._tat - self.tolerance > now:
+                self._shift += seconds
+                self._tat += seconds
+            self._tat = max(self._tat, now + seconds + self.tolerance)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse ``host=rate[/burst],...`` into ``{host: (rate, burst)}``.
+
+    Raises:
+        ValueError: Malformed entry
+    """
+    limits: Dict[str, Tuple[float, int]] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            host, value = entry.split("=", 1)
+            rate, _, burst = value.partition("/")
+            limits[host.strip().lower()] = (float(rate), int(burst or 1))
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid rate limit {entry!r}, expected host=rate[/burst]"
+            ) from e
+    return limits
+
+
+_limits = parse_rate_limits(RATE_LIMITS)
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+_current = threading.local()
+
+
+def get_bucket(host: str) -> Optional[TokenBucket]:
+    """Get the shared bucket of a host, or None if it is not limited.
+
+    A configured host also covers its subdomains.
+    """
+    host = host.lower().split(":")[0]
+    configured = next(
+        (name for name in _limits if host == name or host.endswith("." + name)),
+        None,
+    )
+    if configured is None:
+        return None
+    with _buckets_lock:
+        if configured not in _buckets:
+            _buckets[configured] = TokenBucket(*_limits[configured])
+        return _buckets[configured]
+
+
+def take_retry_token() -> None:
+    """Take a token for a retry of the request the current thread is sending.
+
+    Called by the retry policy before every retry, so retries count against
+    the host's rate like first attempts. The wait is added to the request's
+    ``rate_limit_wait``.
+    """
+    bucket = getattr(_current, "bucket", None)
+    if bucket is not None:
+        _current.waited += bucket.acquire()
+
+
+def note_retry_after(seconds: float) -> None:
+    """Pause the bucket of the host the current thread is talking to.
+
+    Called by the retry policy when it honours a ``Retry-After`` between
+    attempts, so other threads hold back too.
+    """
+    bucket = getattr(_current, "bucket", None)
+    if bucket is not None:
+        bucket.pause(seconds)
+
+
+def rate_limit_wait(response: Optional[requests.Response]) -> float:
+    """Seconds the request behind `response` waited for rate limit tokens."""
+    return getattr(response, "rate_limit_wait", 0.0)
+
+
+def set_rate_limit_wait(response: requests.Response, seconds: float) -> None:
+    """Record on `response` how long its request waited for tokens."""
+    # Response has no field for it, so it is kept as an extra attribute
+    setattr(response, "rate_limit_wait", seconds)
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """Transport adapter that takes a token from the host's bucket per request.
+
+    Retries run inside `inner`; the retry policy takes their tokens through
+    `take_retry_token`. The time spent waiting for tokens is recorded on
+    the response (see `rate_limit_wait`), so latency measurements can leave
+    it out.
+
+    Args:
+        inner: Adapter that sends the requests
+    """
+
+    def __init__(self, inner: BaseAdapter):
+        super().__init__()
+        self.inner = inner
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Union[float, Tuple[Optional[float], Optional[float]], None] = None,
+        verify: Union[bool, str] = True,
+        cert: Union[str, Tuple[str, str], None] = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        def send() -> requests.Response:
+            return self.inner.send(
+                request,
+                stream=stream,
+                timeout=timeout,
+                verify=verify,
+                cert=cert,
+                proxies=proxies,
+            )
+
+        bucket = get_bucket(urlsplit(request.url or "").netloc)
+        if bucket is None:
+            return send()
+
+        _current.waited = bucket.acquire()
+        _current.bucket = bucket
+        try:
+            response = send()
+        finally:
+            _current.bucket = None
+        set_rate_limit_wait(response, _current.waited)
+
+        # Retries are used up; make everyone else wait before the next try
+        if response.status_code in THROTTLE_STATUSES:
+            retry_after = response.headers.get("Retry-After", "")
+            bucket.pause(
+                float(retry_after)
+                if retry_after.isdigit()
+                else bucket.burst * bucket.interval
+            )
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,334 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Resumable downloads into the cache.
+The raw response body is streamed into the cache entry and, in the same
+pass, kept in a ``.part`` file next to it together with the validator it
+was fetched under, so an interrupted download continues with a ranged
+request instead of starting over. Ranges address the encoded bytes, so a
+body sent with a content encoding is not resumable and starts over.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Optional, Tuple
+
+import requests
+
+from generator.cache_io import (
+    CHUNK_SIZE,
+    Digest,
+    atomic_write,
+    cache_write,
+    digest_hasher,
+    hash_file,
+)
+from generator.const import pprint, DOWNLOAD_RETRIES
+from generator.hedging import Cancelled
+from generator.prettyprint import Platform, Status
+from generator.transport import get_session
+
+PART_SUFFIX = ".part"
+"""Filename suffix of partially downloaded response bodies"""
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class IntegrityError(Exception):
+    """Raised when a completed download does not match its expected size or digest."""
+
+
+class PartialDownload:
+    """A ``.part`` file and its sidecar describing what it is a prefix of.
+
+    Both are dotfiles in the cache directory (``.aod.json.part`` and
+    ``.aod.json.part.meta``), so cache listings never pick them up. A
+    `variant` keeps concurrent downloads of the same entry apart.
+    """
+
+    def __init__(self, entry_path: str, variant: str = ""):
+        directory, filename = os.path.split(entry_path)
+        self.part_path = os.path.join(directory, f".{filename}{variant}{PART_SUFFIX}")
+        self.meta_path = f"{self.part_path}.meta"
+
+    @property
+    def size(self) -> int:
+        """Number of bytes downloaded so far."""
+        try:
+            return os.path.getsize(self.part_path)
+        except OSError:
+            return 0
+
+    def read_meta(self) -> Dict[str, Any]:
+        """Read the sidecar, or an empty dict if it is missing or unreadable."""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_meta(self, meta: Dict[str, Any]) -> None:
+        """Atomically replace the sidecar."""
+        with atomic_write(self.meta_path) as writer:
+            writer.write(json.dumps(meta).encode("utf-8"))
+
+    def resume_headers(self, url: str) -> Dict[str, str]:
+        """Build ``Range``/``If-Range`` headers to continue a previous download.
+
+        Nothing is returned when there is no usable partial download for
+        `url`, in which case the download starts from scratch.
+        """
+        meta = self.read_meta()
+        offset = self.size
+        if not offset or meta.get("url") != url or not meta.get("validator"):
+            return {}
+        return {"Range": f"bytes={offset}-", "If-Range": meta["validator"]}
+
+    def clear(self) -> None:
+        """Remove the partial download and its sidecar."""
+        for path in (self.part_path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def _range_validator(response: requests.Response) -> Optional[str]:
+    """Pick the validator to send as ``If-Range`` when resuming.
+
+    ``If-Range`` needs a strong validator, so weak ETags are skipped in
+    favour of ``Last-Modified``.
+    """
+    etag = response.headers.get("ETag", "")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified") or None
+
+
+def _expected_total(response: requests.Response, offset: int) -> Optional[int]:
+    """Full size of the resource according to the response, if known."""
+    content_range = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if content_range and content_range.group(3) != "*":
+        return int(content_range.group(3))
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def _fetch_part(
+    url: str,
+    entry_path: str,
+    partial: PartialDownload,
+    headers: Dict[str, str],
+    timeout: int,
+    slot: Callable[[], ContextManager[Any]],
+    precompressed: bool = False,
+    expected_digest: Optional[Digest] = None,
+    cancelled: Optional[threading.Event] = None,
+    resolve_digest: Optional[Callable[[], Optional[Digest]]] = None,
+) -> Tuple[requests.Response, Optional[str]]:
+    """Fetch the rest of the body and store the complete body as the cache entry.
+
+    Each chunk is appended to the ``.part`` file, which a retry resumes
+    from, and goes through the hasher into the cache entry in the same
+    pass. Only the prefix left by an earlier attempt is read back.
+
+    Returns:
+        The response and the SHA256 of the stored entry, or ``None`` for a
+        304 response, which leaves the partial download untouched
+    """
+    resume_headers = partial.resume_headers(url)
+    request_headers = dict(headers)
+    if resume_headers:
+        # The part was stored unencoded, so ask for the rest the same way; a
+        # resumed download is a new version by definition, so drop
+        # revalidation headers
+        request_headers = {
+            key: value
+            for key, value in request_headers.items()
+            if key not in ("If-None-Match", "If-Modified-Since")
+        }
+        request_headers.update(resume_headers, **{"Accept-Encoding": "identity"})
+
+    with (
+        slot(),
+        get_session().get(
+            url, headers=request_headers, timeout=timeout, stream=True
+        ) as response,
+    ):
+        if response.status_code == 304:
+            return response, None
+        if response.status_code == 416:
+            # The partial file no longer lines up with the resource
+            partial.clear()
+            raise requests.ConnectionError(f"Range not satisfiable for {url}")
+        response.raise_for_status()
+
+        offset = 0
+        if response.status_code == 206:
+            content_range = _CONTENT_RANGE.match(
+                response.headers.get("Content-Range", "")
+            )
+            offset = int(content_range.group(1)) if content_range else -1
+            if offset != partial.size:
+                partial.clear()
+                raise requests.ConnectionError(
+                    f"Unexpected Content-Range for {url}, restarting"
+                )
+        elif resume_headers:
+            # 200 to a ranged request: the resource changed since the
+            # partial download was started
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"Remote file changed, restarting download of {url}",
+            )
+
+        # An encoded body is decoded on the fly: its length says nothing
+        # about the stored size, and its part cannot be resumed
+        encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+        total = None if encoded else _expected_total(response, offset)
+        validator = None if encoded else _range_validator(response)
+        if offset and not validator:
+            validator = partial.read_meta().get("validator")
+        partial.write_meta({"url": url, "validator": validator, "total": total})
+
+        if expected_digest is None and resolve_digest is not None:
+            expected_digest = resolve_digest()
+
+        # A git blob SHA covers the size, so it can only be computed on the
+        # fly when the size is known up front
+        hasher = None
+        if expected_digest and (expected_digest[0] == "sha256" or total is not None):
+            hasher = digest_hasher(expected_digest[0], total or 0)
+
+        with cache_write(
+            entry_path, precompressed=precompressed, cancelled=cancelled
+        ) as writer:
+            if offset:
+                with open(partial.part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        if hasher:
+                            hasher.update(chunk)
+                        writer.write(chunk)
+
+            with open(partial.part_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if cancelled is not None and cancelled.is_set():
+                        raise Cancelled(url)
+                    f.write(chunk)
+                    if hasher:
+                        hasher.update(chunk)
+                    writer.write(chunk)
+
+            size = partial.size
+            if total is not None and size < total:
+                # Keep what arrived so the retry can pick up from there
+                raise requests.ConnectionError(
+                    f"Connection closed after {size} of {total} bytes"
+                )
+            if total is not None and size != total:
+                raise IntegrityError(
+                    f"Size mismatch for {url}: expected {total} bytes, got {size}"
+                )
+            if expected_digest:
+                actual = (
+                    hasher.hexdigest()
+                    if hasher
+                    else hash_file(partial.part_path, expected_digest[0])
+                )
+                if actual != expected_digest[1]:
+                    raise IntegrityError(
+                        f"{expected_digest[0]} mismatch for {url}: expected "
+                        f"{expected_digest[1]}, got {actual}"
+                    )
+
+        return response, writer.hexdigest()
+
+
+def resumable_download(
+    url: str,
+    entry_path: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: int = 120,
+    precompressed: bool = False,
+    expected_digest: Optional[Digest] = None,
+    slot: Optional[Callable[[], ContextManager[Any]]] = None,
+    cancelled: Optional[threading.Event] = None,
+    variant: str = "",
+    resolve_digest: Optional[Callable[[], Optional[Digest]]] = None,
+) -> Tuple[requests.Response, Optional[str]]:
+    """Download `url` into the cache entry `entry_path`, resuming if possible.
+
+    Network errors are retried up to ``DOWNLOAD_RETRIES`` times within the
+    call, and a partial body left behind by a failed run is picked up by the
+    next one. The body is checked against the expected size and, if given,
+    `expected_digest` before it replaces the cache entry.
+
+    Args:
+        url: Source URL
+        entry_path: Uncompressed cache entry path (e.g. ``cache/aod.json``)
+        headers: Extra request headers, including conditional ones
+        timeout: Per-request timeout in seconds
+        precompressed: Whether the body is zstd compressed, see `cache_write`
+        expected_digest: Digest the complete body must match
+        slot: Factory for a context manager held around each request
+        cancelled: Event that abandons the download with `Cancelled` when set
+        variant: Distinguishes the partial file of a concurrent download
+        resolve_digest: Looks up `expected_digest` only once a new body is
+            actually coming, so a 304 costs no lookup; called at most once
+
+    Returns:
+        The last response (already closed) and the SHA256 of the stored
+        cache entry, or ``None`` if the server answered 304 Not Modified.
+
+    Raises:
+        IntegrityError: The completed body did not verify and was discarded
+    """
+    partial = PartialDownload(entry_path, variant)
+    slot = slot or nullcontext
+    if resolve_digest is not None:
+        resolve_digest = functools.cache(resolve_digest)
+
+    attempts = max(DOWNLOAD_RETRIES, 0) + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            response, file_hash = _fetch_part(
+                url,
+                entry_path,
+                partial,
+                headers or {},
+                timeout,
+                slot,
+                precompressed,
+                expected_digest,
+                cancelled,
+                resolve_digest,
+            )
+            break
+        except (IntegrityError, Cancelled):
+            # A corrupt body cannot be fixed by resuming it, and a cancelled
+            # one lost to another download of the same entry
+            partial.clear()
+            raise
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as e:
+            if attempt == attempts:
+                raise
+            pprint.print(
+                Platform.SYSTEM,
+                Status.WARN,
+                f"Download of {url} interrupted at {partial.size} bytes "
+                f"({e}), resuming ({attempt}/{attempts - 1})",
+            )
+
+    if file_hash is not None:
+        partial.clear()
+    return response, file_hash
@@ -0,0 +1,153 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Checkpoint journal for long-running scrapes.
+Each completed unit of work (a listing page, a batch of IDs) is appended to
+a JSONL file as soon as it is done, so a run that dies halfway can resume
+where it stopped instead of starting over. The final data is assembled from
+the journal, which is deleted once it has been saved.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from generator.const import pprint, SCRAPER_RESUME, SCRAPER_RESUME_MAX_AGE_HOURS
+from generator.prettyprint import Platform, Status
+
+JOURNAL_FILENAME = ".{name}.journal.jsonl"
+"""Journal file of a scraper, inside the cache directory"""
+
+
+class ScrapeJournal:
+    """Append-only record of the completed units of a scrape.
+
+    Units are keyed by anything with a stable string form (page number,
+    offset, ID) and hold any JSON-serialisable result, including None for
+    "done, nothing found". The first line is a header with the start time
+    of the run.
+
+    Args:
+        cache_dir: Cache directory to keep the journal in
+        name: Scraper name
+        platform: Platform to log as
+        batch_size: Units buffered before a line is written; a crash loses
+            at most this many
+        resume: Continue an earlier journal instead of starting a new one
+        max_age_hours: Journals started longer ago than this are discarded
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        name: str,
+        platform: Platform,
+        batch_size: int = 1,
+        resume: bool = SCRAPER_RESUME,
+        max_age_hours: int = SCRAPER_RESUME_MAX_AGE_HOURS,
+    ):
+        self.path = os.path.join(cache_dir, JOURNAL_FILENAME.format(name=name))
+        self.platform = platform
+        self.batch_size = max(batch_size, 1)
+        self._units: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        started_at = self._load(max_age_hours) if resume else None
+        if started_at is None:
+            started_at = datetime.now()
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"started_at": started_at.isoformat()}) + "\n")
+        elif self._units:
+            pprint.print(
+                platform,
+                Status.INFO,
+                f"Resuming scrape started {started_at.isoformat(timespec='seconds')}, "
+                f"{len(self._units)} unit(s) already done",
+            )
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return str(key) in self._units or str(key) in self._pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._units) + len(self._pending)
+
+    def get(self, key: object, default: Any = None) -> Any:
+        """Result of a completed unit."""
+        with self._lock:
+            key = str(key)
+            return self._pending.get(key, self._units.get(key, default))
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """All completed units, as (string key, result) pairs."""
+        with self._lock:
+            return iter(list({**self._units, **self._pending}.items()))
+
+    def record(self, key: object, result: Any) -> None:
+        """Mark a unit as done; it is written once the batch is full."""
+        with self._lock:
+            self._pending[str(key)] = result
+            if len(self._pending) >= self.batch_size:
+                self._write()
+
+    def flush(self) -> None:
+        """Write buffered units now."""
+        with self._lock:
+            self._write()
+
+    def finish(self) -> None:
+        """Delete the journal after its data has been saved."""
+        with self._lock:
+            self._file.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def close(self) -> None:
+        """Write buffered units and keep the journal for a later resume."""
+        with self._lock:
+            if not self._file.closed:
+                self._write()
+                self._file.close()
+
+    def _write(self) -> None:
+        if not self._pending:
+            return
+        self._file.write(json.dumps({"units": self._pending}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._units.update(self._pending)
+        self._pending = {}
+
+    def _load(self, max_age_hours: int) -> Optional[datetime]:
+        """Read an earlier journal and return its start time, if it can be resumed."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                started_at = datetime.fromisoformat(header["started_at"])
+                if datetime.now() - started_at > timedelta(hours=max_age_hours):
+                    pprint.print(
+                        self.platform, Status.INFO, "Discarding outdated scrape journal"
+                    )
+                    return None
+                for line in f:
+                    try:
+                        self._units.update(json.loads(line)["units"])
+                    except (ValueError, KeyError):
+                        # A line cut short by the crash; its units run again
+                        continue
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            pprint.print(
+                self.platform, Status.WARN, f"Ignoring unreadable scrape journal: {e}"
+            )
+            self._units = {}
+            return None
+        return started_at
@@ -0,0 +1,277 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+Shared HTTP transport.
+Provides pooled keep-alive sessions with consistent timeouts,
+retry/backoff and per-host rate limits, and records per-host request counts
+and latency histograms for every request made through them.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+from generator.const import (
+    pprint,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_POOL_SIZE,
+    HTTP_RETRIES,
+    HTTP_TIMEOUT,
+)
+from generator.prettyprint import Platform, Status
+from generator.rate_limit import (
+    RateLimitedAdapter,
+    note_retry_after,
+    rate_limit_wait,
+    take_retry_token,
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""Response statuses that are retried with backoff"""
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Upper bounds in seconds of the latency histogram buckets"""
+
+
+@dataclass
+class HostStats:
+    """Request counters and latency histogram of a single host."""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of requests."""
+        if not self.requests:
+            return None
+        target = fraction * self.requests
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class TransportMetrics:
+    """Thread-safe per-host request metrics."""
+
+    def __init__(self) -> None:
+        self._hosts: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        host: str,
+        seconds: float,
+        status: Optional[int] = None,
+        retries: int = 0,
+    ) -> None:
+        """Record one request; a missing `status` counts as an error."""
+        with self._lock:
+            stats = self._hosts.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.retries += retries
+            stats.seconds += seconds
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            if status is None:
+                stats.errors += 1
+            else:
+                stats.statuses[status] += 1
+
+    def snapshot(self) -> Dict[str, HostStats]:
+        """Copy of the current metrics, keyed by host."""
+        with self._lock:
+            return {
+                host: HostStats(
+                    requests=stats.requests,
+                    errors=stats.errors,
+                    retries=stats.retries,
+                    seconds=stats.seconds,
+                    statuses=Counter(stats.statuses),
+                    buckets=list(stats.buckets),
+                )
+                for host, stats in self._hosts.items()
+            }
+
+    def report(self) -> None:
+        """Print a per-host summary, busiest host first."""
+        hosts = sorted(
+            self.snapshot().items(), key=lambda item: item[1].seconds, reverse=True
+        )
+        if not hosts:
+            return
+
+        pprint.print(Platform.SYSTEM, Status.INFO, "Network summary:")
+        for host, stats in hosts:
+            p50 = stats.percentile(0.5)
+            p95 = stats.percentile(0.95)
+            statuses = ", ".join(
+                f"{status}x{count}" for status, count in sorted(stats.statuses.items())
+            )
+            pprint.print(
+                Platform.SYSTEM,
+                Status.INFO,
+                f"  {host}: {stats.requests} requests, {stats.seconds:.1f}s total, "
+                f"p50 <= {p50}s, p95 <= {p95}s, {stats.retries} retries, "
+                f"{stats.errors} errors [{statuses}]",
+            )
+
+
+metrics = TransportMetrics()
+"""Process-wide transport metrics"""
+
+
+def _network_seconds(response: requests.Response, seconds: float) -> float:
+    """Request time without the wait for a rate limit token."""
+    return max(seconds - rate_limit_wait(response), 0.0)
+
+
+def _wire_status(response: requests.Response) -> int:
+    """Status the server sent; a page served from the response cache was a 304."""
+    return 304 if getattr(response, "from_cache", False) else response.status_code
+
+
+def _retry_count(response: requests.Response) -> int:
+    """Number of retries urllib3 made before this response."""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if isinstance(retries, Retry) else 0
+
+
+def _record_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """Response hook feeding `metrics` from any session."""
+    metrics.record(
+        urlsplit(response.url).netloc,
+        _network_seconds(response, response.elapsed.total_seconds()),
+        _wire_status(response),
+        _retry_count(response),
+    )
+
+
+class ThrottleAwareRetry(Retry):
+    """Retry policy that keeps retries within the host's rate limit.
+
+    Every retry takes a token from the host's bucket after its backoff,
+    like a first attempt does. A ``Retry-After`` also pauses the bucket,
+    so other threads do not keep hitting the host meanwhile.
+    """
+
+    def sleep_for_retry(self, response: Any) -> bool:
+        retry_after = self.get_retry_after(response)
+        if retry_after:
+            note_retry_after(retry_after)
+        return super().sleep_for_retry(response)
+
+    def sleep(self, response: Any = None) -> None:
+        super().sleep(response)
+        take_retry_token()
+
+
+def make_retry(
+    retries: int = HTTP_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR
+) -> Retry:
+    """Build the retry policy shared by all sessions."""
+    return ThrottleAwareRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+class PooledSession(requests.Session):
+    """Keep-alive session with connection pooling, retries, per-host rate limits,
+    a default timeout and metrics.
+
+    Args:
+        retries: Total retries per request
+        backoff_factor: Exponential backoff factor between retries
+        timeout: Timeout in seconds used when a request does not pass one
+        pool_size: Connections kept alive per host
+    """
+
+    def __init__(
+        self,
+        retries: int = HTTP_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        timeout: float = HTTP_TIMEOUT,
+        pool_size: int = HTTP_POOL_SIZE,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=make_retry(retries, backoff_factor),
+        )
+        limited = RateLimitedAdapter(adapter)
+        self.mount("https://", limited)
+        self.mount("http://", limited)
+
+    def request(
+        self, method: str, url: Union[str, bytes], *args: Any, **kwargs: Any
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url.decode() if isinstance(url, bytes) else url).netloc
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            metrics.record(host, time.perf_counter() - start)
+            raise
+
+        metrics.record(
+            host,
+            _network_seconds(response, time.perf_counter() - start),
+            _wire_status(response),
+            _retry_count(response),
+        )
+        return response
+
+
+def instrument(
+    session: requests.Session,
+    retries: int = HTTP_RETRIES,
+    backoff_factor: float = HTTP_BACKOFF_FACTOR,
+) -> requests.Session:
+    """Apply the shared retry policy, rate limits and metrics to a session we do not create.
+
+    The session keeps its own adapters (e.g. cloudscraper's TLS adapter);
+    only their retry policy is replaced, and they are wrapped in a
+    `RateLimitedAdapter`.
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if isinstance(adapter, HTTPAdapter):
+            adapter.max_retries = make_retry(retries, backoff_factor)
+            session.mount(prefix, RateLimitedAdapter(adapter))
+    session.hooks["response"].append(_record_response)
+    return session
+
+
+_shared: Optional[PooledSession] = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> PooledSession:
+    """Get the process-wide session used for stateless requests.
+
+    Sessions that carry their own cookies or headers (e.g. a logged-in
+    scraper) should create their own `PooledSession` instead.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PooledSession()
+        return _shared
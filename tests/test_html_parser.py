@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: AGPL-3.0-only
+# Copyright 2025 tajoumaru
+
+"""
+The bs4 and lxml backends must extract identical rows from listing pages.
+Run with ``python -m unittest`` from the repository root.
+"""
+
+import os
+import unittest
+
+from generator.html_parser import HAS_LXML
+from generator.kaize import kaize_extract_list
+from generator.nautiljon import nautiljon_extract_table
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@unittest.skipUnless(HAS_LXML, "lxml is not installed")
+class BackendEquivalenceTest(unittest.TestCase):
+    def assert_same_rows(self, extract, fixture: str, expected: int) -> None:
+        html = read_fixture(fixture)
+        rows = extract(html, backend="bs4")
+        self.assertEqual(rows, extract(html, backend="lxml"))
+        self.assertEqual(len(rows), expected)
+
+    def test_nautiljon_listing(self) -> None:
+        self.assert_same_rows(nautiljon_extract_table, "nautiljon_listing.html", 15)
+
+    def test_kaize_listing(self) -> None:
+        self.assert_same_rows(kaize_extract_list, "kaize_listing.html", 11)
+
+    def test_unclosed_cells(self) -> None:
+        html = (
+            '<table class="search"><tbody><tr>'
+            '<td><a href="/animes/a.html"><img src="/i/a_1.webp"></a>'
+            '<td><a class="eTitre">A</a><span class="infos_small">(B)</span>'
+            "<td>TV<td>Fini"
+            "</tr></tbody></table>"
+        )
+        rows = nautiljon_extract_table(html, backend="bs4")
+        self.assertEqual(rows, nautiljon_extract_table(html, backend="lxml"))
+        self.assertEqual(rows[0]["format"], "TV")
+        self.assertEqual(rows[0]["status"], "Fini")
+
+
+if __name__ == "__main__":
+    unittest.main()